@@ -3,10 +3,15 @@ tests to run and debug your minimax and alphabeta agents locally.  The test
 cases used by the project assistant are not public.
 """
 
+import pickle
+import random
+import time
+import timeit
 import unittest
 
 import isolation
 import game_agent
+import sample_players
 
 from importlib import reload
 
@@ -20,6 +25,684 @@ class IsolationTest(unittest.TestCase):
         self.player2 = "Player2"
         self.game = isolation.Board(self.player1, self.player2)
 
+    def test_bitboard_matches_board(self):
+        """BitBoard must agree with Board on every state of random games"""
+        for width, height in [(7, 7), (5, 8)]:
+            game = isolation.Board(self.player1, self.player2, width, height)
+            bits = isolation.BitBoard(self.player1, self.player2, width, height)
+            while True:
+                for player in (self.player1, self.player2):
+                    self.assertEqual(sorted(game.get_legal_moves(player)),
+                                     sorted(bits.get_legal_moves(player)))
+                    self.assertEqual(game.get_player_location(player),
+                                     bits.get_player_location(player))
+                    self.assertEqual(game.utility(player), bits.utility(player))
+                self.assertEqual(game.to_string(), bits.to_string())
+                moves = game.get_legal_moves()
+                if not moves:
+                    break
+                move = random.choice(moves)
+                game.apply_move(move)
+                bits = bits.forecast_move(move)
+
+    def test_undo_move_restores_state(self):
+        """apply_move followed by undo_move must leave the board unchanged"""
+        for cls in (isolation.Board, isolation.BitBoard):
+            game = cls(self.player1, self.player2)
+            while game.get_legal_moves():
+                before = (game.to_string(), game.hash(), game.move_count,
+                          game.active_player)
+                for move in game.get_legal_moves():
+                    game.apply_move(move)
+                    game.undo_move()
+                    self.assertEqual(before, (game.to_string(), game.hash(),
+                                              game.move_count,
+                                              game.active_player))
+                game.apply_move(random.choice(game.get_legal_moves()))
+
+    def test_search_leaves_game_unchanged(self):
+        """Searching in-place must not modify the board passed to get_move"""
+        for player in (game_agent.MinimaxPlayer(),
+                       game_agent.AlphaBetaPlayer()):
+            game = isolation.Board(player, self.player2)
+            game.apply_move((3, 3))
+            game.apply_move((2, 2))
+            before = game.to_string()
+            deadline = 1000 * timeit.default_timer() + 150
+            move = player.get_move(
+                game, lambda: deadline - 1000 * timeit.default_timer())
+            self.assertIn(move, game.get_legal_moves())
+            self.assertEqual(before, game.to_string())
+
+    def test_zobrist_key_is_incremental(self):
+        """The incremental Zobrist key must match a from-scratch hash"""
+        game = isolation.Board(self.player1, self.player2)
+        bits = isolation.BitBoard(self.player1, self.player2)
+        while True:
+            self.assertEqual(game.zobrist_key, game._zobrist_hash())
+            self.assertEqual(bits.zobrist_key, bits._zobrist_hash())
+            self.assertEqual(game.zobrist_key, bits.zobrist_key)
+            self.assertEqual(game.hash(), game.copy().hash())
+            moves = game.get_legal_moves()
+            if not moves:
+                break
+            for move in moves:
+                game.apply_move(move)
+                self.assertEqual(game.zobrist_key, game._zobrist_hash())
+                game.undo_move()
+            move = random.choice(moves)
+            game.apply_move(move)
+            bits.apply_move(move)
+
+    def test_seeded_move_order_is_reproducible(self):
+        """Boards with the same seed must generate moves in the same order"""
+        for cls in (isolation.Board, isolation.BitBoard):
+            histories = []
+            for _ in range(2):
+                game = cls(self.player1, self.player2, seed=42)
+                history = []
+                while game.get_legal_moves():
+                    move = game.get_legal_moves()[0]
+                    history.append(move)
+                    game = game.forecast_move(move)
+                histories.append(history)
+            self.assertEqual(histories[0], histories[1])
+
+            game = cls(self.player1, self.player2, shuffle=False)
+            game.apply_move((3, 3))
+            game.apply_move((0, 0))
+            self.assertEqual(game.get_legal_moves(), game.get_legal_moves())
+
+    def test_mobility_matches_move_lists(self):
+        """mobility() must agree with utility() and the move list lengths"""
+        for cls in (isolation.Board, isolation.BitBoard):
+            game = cls(self.player1, self.player2)
+            while True:
+                for player in (self.player1, self.player2):
+                    opponent = game.get_opponent(player)
+                    self.assertEqual(game.mobility(player), (
+                        game.utility(player),
+                        len(game.get_legal_moves(player)),
+                        len(game.get_legal_moves(opponent))))
+                    self.assertEqual(game.count_legal_moves(player),
+                                     len(game.get_legal_moves(player)))
+                moves = game.get_legal_moves()
+                if not moves:
+                    break
+                game.apply_move(random.choice(moves))
+
+    def test_legal_move_cache_is_refreshed(self):
+        """Cached legal moves must be private to callers and follow the state"""
+        for cls in (isolation.Board, isolation.BitBoard):
+            game = cls(self.player1, self.player2, shuffle=False)
+            game.apply_move((3, 3))
+            game.apply_move((2, 2))
+            moves = game.get_legal_moves()
+            game.get_legal_moves().clear()
+            self.assertEqual(moves, game.get_legal_moves())
+            game.apply_move(moves[0])
+            self.assertNotIn(moves[0], game.get_legal_moves(self.player2))
+            game.undo_move()
+            self.assertEqual(moves, game.get_legal_moves())
+            self.assertEqual(moves, game.copy().get_legal_moves())
+
+    @unittest.skipUnless(hasattr(isolation, "BoardBatch"), "requires numpy")
+    def test_board_batch_matches_board(self):
+        """BoardBatch must agree with Board on legal moves and round-trip"""
+        boards = []
+        for _ in range(50):
+            game = isolation.Board(self.player1, self.player2)
+            for _ in range(random.randint(0, 30)):
+                moves = game.get_legal_moves()
+                if not moves:
+                    break
+                game.apply_move(random.choice(moves))
+            boards.append(game)
+        batch = isolation.BoardBatch.from_boards(boards)
+        mask = batch.legal_move_mask()
+        for i, game in enumerate(boards):
+            self.assertEqual(
+                sorted(r + c * game.height for r, c in game.get_legal_moves()),
+                mask[i].nonzero()[0].tolist())
+            copy = batch.to_board(i, self.player1, self.player2)
+            self.assertEqual(game.to_string(), copy.to_string())
+            self.assertEqual(game.hash(), copy.hash())
+        batch.playout()
+        self.assertTrue(batch.is_terminal().all())
+
+    def test_distinct_opening_moves(self):
+        """Opening placements must be reduced by the board symmetries"""
+        for cls in (isolation.Board, isolation.BitBoard):
+            game = cls(self.player1, self.player2)
+            self.assertEqual(10, len(game.get_distinct_moves()))
+            self.assertEqual(list(game.iter_blank_spaces()),
+                             game.get_blank_spaces())
+            self.assertEqual(len(game.get_blank_spaces()),
+                             game.count_blank_spaces())
+            game.apply_move((3, 3))
+            self.assertEqual(9, len(game.get_distinct_moves()))
+            game.apply_move((0, 1))
+            self.assertEqual(sorted(game.get_legal_moves()),
+                             sorted(game.get_distinct_moves()))
+            game = cls(self.player1, self.player2, width=9, height=5)
+            self.assertEqual(15, len(game.get_distinct_moves()))
+
+    def test_integer_move_api(self):
+        """The integer move API must mirror the tuple API"""
+        for cls in (isolation.Board, isolation.BitBoard):
+            game = cls(self.player1, self.player2, shuffle=False)
+            while True:
+                moves = game.get_legal_moves()
+                self.assertEqual(moves, [game.index_to_move(idx)
+                                         for idx in game.legal_move_indices()])
+                if not moves:
+                    break
+                move = random.choice(moves)
+                other = game.copy()
+                other.apply_index(game.move_to_index(move))
+                game.apply_move(move)
+                self.assertEqual(game.hash(), other.hash())
+                self.assertEqual(game.to_string(), other.to_string())
+
+    def test_transposition_table_keeps_search_results(self):
+        """Iterative deepening with a transposition table must find the same
+        scores as a search without one"""
+        with_tt = game_agent.AlphaBetaPlayer(tt_size_mb=1)
+        without_tt = game_agent.AlphaBetaPlayer(tt_size_mb=0)
+        games = []
+        for player in (with_tt, without_tt):
+            player.time_left = lambda: 1000.
+            game = isolation.Board(player, self.player2)
+            for move in [(3, 3), (2, 2), (1, 4), (4, 4)]:
+                game.apply_move(move)
+            games.append(game)
+        with_tt.tt.new_search()
+        for depth in range(1, 6):
+            scores = [player.alpha_beta_common(game.copy(), depth,
+                                               float("-inf"), float("inf"),
+                                               True)[0]
+                      for player, game in zip((with_tt, without_tt), games)]
+            self.assertEqual(scores[0], scores[1])
+
+    def test_move_ordering(self):
+        """The PV move is searched first, then killer moves, then the other
+        moves by history score, and ordering does not change search results"""
+        ordering = game_agent.MoveOrdering()
+        ordering.cutoff(10, 2, 0, 3)
+        ordering.cutoff(20, 1, 0, 1)
+        ordering.cutoff(30, 1, 0, 2)
+        self.assertEqual(ordering.order([5, 10, 20, 30, 40], 1, 0, 40),
+                         [40, 30, 20, 10, 5])
+        self.assertEqual(ordering.order([5, 10, 20], 1, 1), [20, 5, 10])
+
+        ordered = game_agent.AlphaBetaPlayer(tt_size_mb=0)
+        unordered = game_agent.AlphaBetaPlayer(tt_size_mb=0, ordering=False)
+        games = []
+        for player in (ordered, unordered):
+            player.time_left = lambda: 1000.
+            game = isolation.Board(player, self.player2)
+            for move in [(3, 3), (2, 2), (1, 4), (4, 4)]:
+                game.apply_move(move)
+            games.append(game)
+        for depth in range(1, 6):
+            ordered._root_depth = depth
+            scores = [player.alpha_beta_common(game.copy(), depth,
+                                               float("-inf"), float("inf"),
+                                               True)[0]
+                      for player, game in zip((ordered, unordered), games)]
+            self.assertEqual(scores[0], scores[1])
+
+    def test_search_results_persist_across_turns(self):
+        """The transposition table is kept between turns of a game and
+        cleared when a new game starts"""
+        player = game_agent.AlphaBetaPlayer(book=False)
+        game = isolation.Board(player, self.player2)
+        for move in [(3, 3), (2, 2)]:
+            game.apply_move(move)
+        deadline = 1000 * timeit.default_timer() + 100
+        player.get_move(game, lambda: deadline - 1000 * timeit.default_timer())
+        key = game.zobrist_key
+        self.assertIsNotNone(player.tt.lookup(key))
+
+        game.apply_move(player.get_move(game, lambda: 0.))
+        game.apply_move(game.get_legal_moves()[0])
+        player.get_move(game, lambda: 0.)
+        self.assertIsNotNone(player.tt.lookup(key))
+
+        player.get_move(isolation.Board(player, self.player2), lambda: 0.)
+        self.assertIsNone(player.tt.lookup(key))
+
+    def test_pondering(self):
+        """A pondering player searches the position after its move until
+        its next turn"""
+        player = game_agent.AlphaBetaPlayer(book=False, ponder_ms=5000)
+        game = isolation.Board(player, self.player2)
+        for move in [(3, 3), (2, 2)]:
+            game.apply_move(move)
+        deadline = 1000 * timeit.default_timer() + 50
+        move = player.get_move(
+            game, lambda: deadline - 1000 * timeit.default_timer())
+        game.apply_move(move)
+        self.assertTrue(player._ponder_thread.is_alive())
+        time.sleep(0.05)
+        player.stop_pondering()
+        self.assertIsNone(player._ponder_thread)
+        self.assertIsNotNone(player.tt.lookup(game.zobrist_key))
+
+        game.apply_move(game.get_legal_moves()[0])
+        deadline = 1000 * timeit.default_timer() + 50
+        move = player.get_move(
+            game, lambda: deadline - 1000 * timeit.default_timer())
+        self.assertIn(move, game.get_legal_moves())
+        player.stop_pondering()
+
+        # Starting the thread does not use up the time the player leaves on
+        # its clock
+        for i in range(2):
+            player = game_agent.AlphaBetaPlayer(book=False, ponder_ms=150)
+            opponent = game_agent.AlphaBetaPlayer(
+                score_fn=sample_players.improved_score, book=False)
+            times_left = []
+
+            def get_move(game, time_left, get_move=player.get_move):
+                move = get_move(game, time_left)
+                times_left.append(time_left())
+                return move
+
+            player.get_move = get_move
+            players = (player, opponent) if i else (opponent, player)
+            game = isolation.Board(*players)
+            winner, _, outcome = game.play(time_limit=100)
+            player.close()
+            self.assertNotEqual("timeout", outcome)
+            self.assertGreater(min(times_left), player.TIMER_THRESHOLD)
+
+    def test_parallel_search(self):
+        """Boards survive a round trip through get_state, and a parallel
+        search returns a legal move before the deadline"""
+        game = isolation.Board(self.player1, self.player2)
+        for move in [(3, 3), (2, 2), (1, 4)]:
+            game.apply_move(move)
+        for board_class in (isolation.Board, isolation.BitBoard):
+            board = board_class.from_state(self.player1, self.player2,
+                                           game.get_state())
+            self.assertEqual(board.to_string(), game.to_string())
+            self.assertEqual(board.zobrist_key, game.zobrist_key)
+            self.assertEqual(board.active_player, game.active_player)
+
+        player = game_agent.AlphaBetaPlayer(workers=2, book=False)
+        game = isolation.Board(self.player1, player)
+        for move in [(3, 3), (2, 2), (1, 4)]:
+            game.apply_move(move)
+        try:
+            for _ in range(2):
+                deadline = 1000 * timeit.default_timer() + 150
+                time_left = lambda: deadline - 1000 * timeit.default_timer()
+                move = player.get_move(game, time_left)
+                self.assertGreater(time_left(), 0)
+                self.assertIn(move, game.get_legal_moves())
+        finally:
+            player.close()
+
+    def test_window_search_keeps_scores(self):
+        """Principal variation search and aspiration windows must find the
+        same scores as a full-window search"""
+        players = [game_agent.AlphaBetaPlayer(),
+                   game_agent.AlphaBetaPlayer(pvs=True),
+                   game_agent.AlphaBetaPlayer(pvs=True, aspiration_window=1.)]
+        games = []
+        for player in players:
+            player.time_left = lambda: 1000.
+            game = isolation.Board(player, self.player2)
+            for move in [(3, 3), (2, 2), (1, 4), (4, 4)]:
+                game.apply_move(move)
+            games.append(game)
+        for depth in range(1, 7):
+            scores = []
+            for player, game in zip(players, games):
+                player.aspiration_search(game, depth)
+                scores.append(player._root_score)
+            self.assertEqual(scores[0], scores[1])
+            self.assertEqual(scores[0], scores[2])
+
+    def test_root_moves_search(self):
+        """Searching a list of root moves, as the worker processes of a
+        parallel search do, finds the same scores as searching the position,
+        and only returns one of the given moves"""
+        for kwargs in ({}, {"pvs": True}, {"tt_size_mb": 0, "ordering": False}):
+            players = [game_agent.AlphaBetaPlayer(book=False, **kwargs)
+                       for _ in range(2)]
+            games = []
+            for player in players:
+                player.time_left = lambda: 1000.
+                game = isolation.Board(player, self.player2, shuffle=False)
+                for move in [(3, 3), (2, 2), (1, 4), (4, 4)]:
+                    game.apply_move(move)
+                games.append(game)
+            moves = games[1].legal_move_indices()
+            for depth in range(1, 6):
+                players[0]._root_depth = depth
+                score, _ = players[0].alpha_beta_common(
+                    games[0].copy(), depth, float("-inf"), float("inf"), True)
+                root_score, move = players[1].alpha_beta_common(
+                    games[1].copy(), depth, float("-inf"), float("inf"), True,
+                    root_moves=moves)
+                self.assertEqual(score, root_score)
+                self.assertIn(move, moves)
+                root_score, move = players[1].alpha_beta_common(
+                    games[1].copy(), depth, float("-inf"), float("inf"), True,
+                    root_moves=moves[1:])
+                self.assertIn(move, moves[1:] + [-1])
+
+    def test_search_stats(self):
+        """Every call to get_move records the statistics of its search"""
+        player = game_agent.AlphaBetaPlayer(book=False)
+        game = isolation.Board(player, self.player2)
+        for move in [(3, 3), (2, 2), (1, 4), (4, 4)]:
+            game.apply_move(move)
+        deadline = 1000 * timeit.default_timer() + 50
+        time_left = lambda: deadline - 1000 * timeit.default_timer()
+        player.get_move(game, time_left)
+        stats = player.stats
+        self.assertGreater(stats.depth, 0)
+        self.assertGreater(stats.nodes, stats.leaves)
+        self.assertGreater(stats.leaves, 0)
+        self.assertGreater(sum(stats.cutoffs.values()), 0)
+        self.assertGreater(stats.nodes_per_second, 0)
+        self.assertGreater(stats.time_left, 0)
+        self.assertLessEqual(stats.elapsed, 50)
+
+        game.apply_move(game.get_legal_moves()[0])
+        player.get_move(game, lambda: 0.)
+        self.assertIsNot(stats, player.stats)
+        self.assertEqual(0, player.stats.depth)
+        self.assertEqual(0, player.stats.nodes)
+
+        player = game_agent.MinimaxPlayer(search_depth=2)
+        game = isolation.Board(player, self.player2)
+        for move in [(3, 3), (2, 2)]:
+            game.apply_move(move)
+        player.get_move(game, lambda: 1000.)
+        moves = len(game.get_legal_moves())
+        self.assertEqual(2, player.stats.depth)
+        self.assertEqual(player.stats.leaves + moves + 1, player.stats.nodes)
+
+    def test_forecast_mobility(self):
+        """forecast_mobility counts the moves of the states forecast_move
+        would return, and custom_score is the LookAhead score built on it"""
+        def look_ahead(game, player):
+            # custom_score before it was computed with forecast_mobility
+            utility = game.utility(player)
+            if utility:
+                return utility
+            score = game_agent.endgame_score(game, player)
+            if score is not None:
+                return score
+            opponent = game.get_opponent(player)
+            own = game.get_legal_moves(player)
+            opp = game.get_legal_moves(opponent)
+            own_next = sum(len(game.forecast_move(m).get_legal_moves(
+                game.active_player)) for m in own)
+            opp_next = sum(len(game.forecast_move(m).get_legal_moves())
+                           for m in opp)
+            return float(len(own) + own_next - len(opp) - opp_next)
+
+        random.seed(7)
+        for board_class in (isolation.Board, isolation.BitBoard):
+            for _ in range(10):
+                game = board_class(self.player1, self.player2, 6, 7)
+                while True:
+                    for player in (self.player1, self.player2):
+                        for counted in (self.player1, self.player2):
+                            moves = game.get_legal_moves(player)
+                            total = sum(
+                                len(game.forecast_move(m).get_legal_moves(
+                                    counted)) for m in moves)
+                            self.assertEqual(
+                                (len(moves), total),
+                                game.forecast_mobility(player, counted))
+                        self.assertEqual(
+                            look_ahead(game, player),
+                            game_agent.custom_score(game, player))
+                    moves = game.get_legal_moves()
+                    if not moves:
+                        break
+                    game.apply_move(random.choice(moves))
+
+    def test_eval_cache(self):
+        """A cached score function returns the values of the function it
+        wraps, evaluating every position and point of view only once"""
+        calls = []
+
+        @game_agent.cached_score(size=2)
+        def score(game, player):
+            calls.append(game.zobrist_key)
+            return game_agent.custom_score(game, player)
+
+        for move in [(3, 3), (2, 2)]:
+            self.game.apply_move(move)
+        expected = game_agent.custom_score(self.game, self.player1)
+        self.assertEqual(expected, score(self.game, self.player1))
+        self.assertEqual(expected, score(self.game.copy(), self.player1))
+        self.assertEqual(1, len(calls))
+        self.assertEqual(game_agent.custom_score(self.game, self.player2),
+                         score(self.game, self.player2))
+        self.assertAlmostEqual(1 / 3, score.hit_rate)
+
+        # The least recently used entry is evicted
+        score(self.game.forecast_move((1, 1)), self.player1)
+        self.assertEqual(2, len(score))
+        score(self.game, self.player1)
+        self.assertEqual(4, len(calls))
+        score(self.game, self.player2)
+        self.assertEqual(5, len(calls))
+
+        # Copies sent to worker processes are empty and compare equal
+        copy = pickle.loads(pickle.dumps(game_agent.EvalCache(
+            game_agent.custom_score)))
+        self.assertEqual(0, len(copy))
+        self.assertEqual(game_agent.EvalCache(game_agent.custom_score), copy)
+
+    def test_clock_checks(self):
+        """The clock is read once every CLOCK_CHECK_INTERVAL nodes, and
+        get_move does not start an iteration that cannot finish"""
+        player = game_agent.AlphaBetaPlayer()
+        game = isolation.Board(player, self.player2)
+        for move in [(3, 3), (2, 2), (1, 4), (4, 4)]:
+            game.apply_move(move)
+        calls = []
+        player.time_left = lambda: calls.append(1) or 1000.
+        player.alphabeta(game, 5)
+        self.assertLessEqual(
+            len(calls), 2 + player._nodes // player.CLOCK_CHECK_INTERVAL)
+
+        # The clock runs 1 ms per read: the second iteration takes as long
+        # as the first one times the branching factor, and cannot finish
+        player = game_agent.AlphaBetaPlayer(timeout=0., book=False)
+        game = isolation.Board(player, self.player2)
+        for move in [(3, 3), (2, 2), (1, 4), (4, 4)]:
+            game.apply_move(move)
+        clock = [30]
+        player.get_move(game, lambda: clock.append(clock.pop() - 1) or clock[0])
+        self.assertGreater(clock[0], 0)
+
+    def test_endgame_solver(self):
+        """Once the players are separated, the solver finds the longest paths
+        and predicts the winner of the game"""
+        from isolation import endgame
+
+        def longest(game, idx, used):
+            """Length of the longest path from cell idx by brute force"""
+            best = 0
+            for n, _ in game._neighbors[idx]:
+                if n in blank and n not in used:
+                    used.add(n)
+                    best = max(best, 1 + longest(game, n, used))
+                    used.discard(n)
+            return best
+
+        rng = random.Random(0)
+        solved = 0
+        while solved < 10:
+            game = isolation.Board(self.player1, self.player2, shuffle=False)
+            bits = isolation.BitBoard(self.player1, self.player2)
+            while not game.is_partitioned():
+                self.assertFalse(bits.is_partitioned())
+                moves = game.get_legal_moves()
+                if not moves:
+                    break
+                move = rng.choice(moves)
+                game.apply_move(move)
+                bits.apply_move(move)
+            score = endgame.endgame_score(game, self.player1)
+            if not game.get_legal_moves() or score is None:
+                continue
+            self.assertTrue(bits.is_partitioned())
+            solved += 1
+
+            blank = set(game._blank_indices())
+            for player in (self.player1, self.player2):
+                self.assertEqual(
+                    endgame.longest_path(game, player),
+                    longest(game, game._loc_index(player), set()))
+
+            # Both players follow their longest paths to the end
+            while game.get_legal_moves():
+                game.apply_index(endgame.endgame_move(game))
+            self.assertEqual(score, game.utility(self.player1))
+
+        # The same cell indices describe different cells on boards of
+        # different heights, so their paths must not share cache entries
+        open_cells = {15, 17, 24, 28, 32, 41}
+        for width, height, length in [(7, 7, 3), (8, 6, 4), (7, 7, 3)]:
+            blocked = tuple(idx for idx in range(width * height)
+                            if idx not in open_cells)
+            game = isolation.Board.from_state(
+                self.player1, self.player2,
+                (width, height, blocked, 2, 47, False, 10))
+            self.assertEqual(length, endgame.longest_path(game, self.player1))
+
+    def test_opening_book(self):
+        """Symmetric states share a canonical key, and the book answers them
+        with the same move in their own frames"""
+        import os
+        import tempfile
+        import opening_book
+
+        game = isolation.Board(self.player1, self.player2)
+        mirror = isolation.Board(self.player1, self.player2)
+        for move in [(3, 3), (2, 1)]:
+            game.apply_move(move)
+            mirror.apply_move((move[0], 6 - move[1]))
+        self.assertEqual(game.canonical_key()[0], mirror.canonical_key()[0])
+        self.assertNotEqual(game.zobrist_key, mirror.zobrist_key)
+
+        records = opening_book.build_book(plies=3, depth=2)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "book.bin")
+            opening_book.write_book(
+                records, 3, opening_book.heuristic_name(
+                    game_agent.custom_score), path)
+            book = opening_book.OpeningBook(path)
+            try:
+                self.assertEqual(len(records), len(book))
+                self.assertEqual("game_agent.custom_score", book.heuristic)
+                move = book.lookup(game)
+                self.assertIn(move, game.get_legal_moves())
+                self.assertEqual((move[0], 6 - move[1]), book.lookup(mirror))
+                game.apply_move(move)
+                self.assertIsNone(book.lookup(game))
+
+                player = game_agent.AlphaBetaPlayer(book=book)
+                game = isolation.Board(player, self.player2)
+                game.apply_move((3, 3))
+                game.apply_move((2, 1))
+                self.assertEqual(move, player.get_move(game, lambda: 0.))
+            finally:
+                book.close()
+
+        # The shipped book is only used by default with its own heuristic
+        self.assertIsNotNone(game_agent.AlphaBetaPlayer().book)
+        self.assertIsNotNone(game_agent.AlphaBetaPlayer(
+            score_fn=game_agent.cached_score(game_agent.custom_score)).book)
+        self.assertIsNone(game_agent.AlphaBetaPlayer(
+            score_fn=sample_players.improved_score).book)
+
+    def test_mcts_player(self):
+        """Playouts and the Monte Carlo tree search leave the board unchanged,
+        and the search returns a legal move before the deadline"""
+        for cls in (isolation.Board, isolation.BitBoard):
+            game = cls(self.player1, self.player2, seed=0)
+            for move in [(3, 3), (2, 1), (1, 5)]:
+                game.apply_move(move)
+            state, key = game.to_string(), game.zobrist_key
+            for policy in ("random", "greedy"):
+                for _ in range(20):
+                    self.assertIn(game.playout(policy),
+                                  (self.player1, self.player2))
+                self.assertEqual(state, game.to_string())
+                self.assertEqual(key, game.zobrist_key)
+                self.assertTrue(game.get_legal_moves())
+
+        # Player 2 wins the playout once player 1 runs out of moves
+        game = isolation.Board(self.player1, self.player2)
+        game.apply_move((0, 0))
+        game.apply_move((4, 4))
+        game.apply_move((1, 2))
+        game.apply_move((6, 6))
+        for move in [(0, 4), (2, 0), (2, 4), (3, 1), (3, 3)]:
+            game._board_state[game.move_to_index(move)] = 1
+        self.assertEqual(self.player2, game.playout("greedy"))
+
+        player = game_agent.MCTSPlayer(rollout_policy="greedy", seed=0)
+        game = isolation.Board(player, self.player2)
+        for move in [(3, 3), (2, 1)]:
+            game.apply_move(move)
+        state = game.to_string()
+        deadline = 1000 * timeit.default_timer() + 100
+        time_left = lambda: deadline - 1000 * timeit.default_timer()
+        move = player.get_move(game, time_left)
+        self.assertGreater(time_left(), 0)
+        self.assertGreater(player.rollouts, 0)
+        self.assertIn(move, game.get_legal_moves())
+        self.assertEqual(state, game.to_string())
+
+    def test_profiling_hooks(self):
+        """The profiler charges the time of a game to subsystems by player,
+        and restores the original functions when it is disabled"""
+        from isolation import profiling
+
+        get_legal_moves = isolation.Board.get_legal_moves
+        forecast_mobility = isolation.Board.forecast_mobility
+        copy = isolation.BitBoard.copy
+        player = game_agent.AlphaBetaPlayer(book=False)
+        score = player.score
+        game = isolation.Board(player, game_agent.MinimaxPlayer())
+        winner, history, outcome, profiler = profiling.profile_game(
+            game, names=("AB", "MM"))
+        self.assertFalse(profiler.enabled)
+        self.assertIs(get_legal_moves, isolation.Board.get_legal_moves)
+        self.assertIs(forecast_mobility, isolation.Board.forecast_mobility)
+        self.assertIs(copy, isolation.BitBoard.copy)
+        self.assertIs(score, player.score)
+        self.assertNotIn("get_move", vars(player))
+
+        for name in ("AB", "MM"):
+            self.assertGreater(profiler.moves[name], 0)
+            for subsystem in ("search", "evaluation", "move generation",
+                              "apply/undo", "copy"):
+                self.assertGreater(profiler.calls[name][subsystem], 0)
+        self.assertEqual(profiler.moves["AB"], profiler.calls["AB"]["search"])
+        self.assertIn("AB:", profiler.report())
+
+        with profiling.Profiler() as profiler:
+            profiler.enable()
+            self.assertTrue(profiler.enabled)
+            self.assertIsNot(forecast_mobility,
+                             isolation.Board.forecast_mobility)
+            self.assertRaises(RuntimeError, profiling.Profiler().enable)
+        self.assertFalse(profiler.enabled)
+
 
 if __name__ == '__main__':
     unittest.main()
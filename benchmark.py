@@ -0,0 +1,147 @@
+"""Compare the number of nodes searched by the alpha-beta search variants of
+`AlphaBetaPlayer` (principal variation search and aspiration windows) when
+searching a fixed set of positions to a fixed depth.
+
+Every variant must find the same score for each position; only the number of
+nodes and the search time may differ.
+
+With --mcts, measure instead the number of rollouts per second of the rollout
+policies of `MCTSPlayer`, compared to random rollouts that copy the board with
+`forecast_move` at every move.
+"""
+import argparse
+import random
+import timeit
+
+from isolation import Board
+from game_agent import AlphaBetaPlayer, MCTSPlayer
+
+NUM_POSITIONS = 20  # number of positions searched by every variant
+SEARCH_DEPTH = 8  # depth of the last iterative deepening iteration
+OPENING_PLIES = 6  # number of random moves played to reach each position
+ASPIRATION_WINDOW = 8.  # half-width of the aspiration windows
+ROLLOUT_SECONDS = 2.  # time spent on the rollouts of every policy
+
+VARIANTS = [
+    ("Alpha-beta", {}),
+    ("PVS", {"pvs": True}),
+    ("Aspiration", {"aspiration_window": ASPIRATION_WINDOW}),
+    ("PVS + aspiration", {"pvs": True,
+                          "aspiration_window": ASPIRATION_WINDOW}),
+]
+
+
+def make_positions(num_positions, plies, seed):
+    """Return a list of board states (see `Board.get_state`) reached by
+    playing random moves from the empty board.
+    """
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < num_positions:
+        game = Board("1", "2", shuffle=False)
+        for _ in range(plies):
+            moves = game.get_legal_moves()
+            if not moves:
+                break
+            game.apply_move(rng.choice(moves))
+        if game.get_legal_moves():
+            positions.append(game.get_state())
+    return positions
+
+
+def search(kwargs, positions, depth):
+    """Search every position to the given depth by iterative deepening with
+    a new player built with the given arguments; return the total number of
+    nodes, the total time in seconds and the list of root scores.
+    """
+    nodes = 0
+    elapsed = 0.
+    scores = []
+    for state in positions:
+        player = AlphaBetaPlayer(book=False, **kwargs)
+        player.time_left = lambda: float("inf")
+        if state[5]:
+            game = Board.from_state("1", player, state, shuffle=False)
+        else:
+            game = Board.from_state(player, "2", state, shuffle=False)
+        start = timeit.default_timer()
+        for d in range(1, depth + 1):
+            player.aspiration_search(game, d)
+        elapsed += timeit.default_timer() - start
+        nodes += player._nodes
+        scores.append(player._root_score)
+    return nodes, elapsed, scores
+
+
+def forecast_rollout(game, rng):
+    """Play random moves to the end of the game, copying the board at every
+    move; return the winner.
+    """
+    moves = game.get_legal_moves()
+    while moves:
+        game = game.forecast_move(rng.choice(moves))
+        moves = game.get_legal_moves()
+    return game.inactive_player
+
+
+def rollout_rate(policy, positions, seconds):
+    """Play rollouts from the positions in turn for the given number of
+    seconds with an MCTSPlayer using the rollout policy (or forecast_rollout
+    if the policy is None); return the number of rollouts per second.
+    """
+    player = MCTSPlayer(rollout_policy=policy or "random", seed=0)
+    rng = random.Random(0)
+    games = [Board.from_state(player, "2", state, seed=0)
+             for state in positions]
+    rollouts = 0
+    start = timeit.default_timer()
+    while timeit.default_timer() - start < seconds:
+        for game in games:
+            if policy is None:
+                forecast_rollout(game, rng)
+            else:
+                player.rollout(game)
+        rollouts += len(games)
+    return rollouts / (timeit.default_timer() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--positions", type=int, default=NUM_POSITIONS)
+    parser.add_argument("--depth", type=int, default=SEARCH_DEPTH)
+    parser.add_argument("--plies", type=int, default=OPENING_PLIES)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--mcts", action="store_true",
+                        help="measure the rollouts per second of MCTSPlayer")
+    args = parser.parse_args()
+
+    positions = make_positions(args.positions, args.plies, args.seed)
+    if args.mcts:
+        print("Rollouts from {} positions after {} random plies\n".format(
+            len(positions), args.plies))
+        print("{:<18}{:>14}".format("Rollout", "Rollouts / s"))
+        for name, policy in [("forecast_move", None), ("Random", "random"),
+                             ("Greedy", "greedy")]:
+            print("{:<18}{:>14.0f}".format(
+                name, rollout_rate(policy, positions, ROLLOUT_SECONDS)))
+        return
+
+    print("{} positions after {} random plies, searched to depth {}\n".format(
+        len(positions), args.plies, args.depth))
+    print("{:<18}{:>10}{:>10}{:>10}".format("Variant", "Nodes", "Relative",
+                                             "Time (s)"))
+
+    baseline_nodes = baseline_scores = None
+    for name, kwargs in VARIANTS:
+        nodes, elapsed, scores = search(kwargs, positions, args.depth)
+        if baseline_nodes is None:
+            baseline_nodes, baseline_scores = nodes, scores
+        print("{:<18}{:>10}{:>10.2f}{:>10.2f}".format(
+            name, nodes, nodes / baseline_nodes, elapsed))
+        if scores != baseline_scores:
+            print("  WARNING: {} positions have different scores".format(
+                sum(a != b for a, b in zip(scores, baseline_scores))))
+
+
+if __name__ == "__main__":
+    main()
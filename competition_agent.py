@@ -42,7 +42,11 @@ class CustomPlayer:
 
     You must at least implement the get_move() method and a search function
     to complete this class, but you may use any of the techniques discussed
-    in lecture or elsewhere on the web -- opening books, MCTS, etc.
+    in lecture or elsewhere on the web -- opening books, MCTS, etc. The
+    `MoveOrdering` class of game_agent.py (PV move, killer moves and history
+    heuristic) does not depend on AlphaBetaPlayer and can be reused by the
+    search: call its order() method before expanding a node and cutoff()
+    when a move causes a cutoff.
 
     **************************************************************************
           THIS CLASS IS OPTIONAL -- IT IS ONLY USED IN THE ISOLATION PvP
@@ -4,6 +4,15 @@ and include the results in your report.
 """
 import random
 import math
+import multiprocessing
+import threading
+import time
+
+from array import array
+from collections import OrderedDict, defaultdict
+
+from isolation.endgame import endgame_move, endgame_score
+from opening_book import heuristic_name, load_book
 
 
 class SearchTimeout(Exception):
@@ -23,6 +32,65 @@ def calculate_distance(game, player, opp_player):
     return math.sqrt(x_distance + y_distance)
 
 
+def _index_to_move(game, idx):
+    """Convert a move returned by the search helpers, which work on cell
+    indices, to the (row, column) pair returned to `Board.play`; -1 becomes
+    (-1, -1), and None (no move searched) is passed through.
+    """
+    if idx is None:
+        return None
+    if idx < 0:
+        return (-1, -1)
+    return game.index_to_move(idx)
+
+
+# The search player of a worker process of a parallel AlphaBetaPlayer, kept
+# between tasks (with its transposition table) as (settings, player, opponent)
+_worker = None
+
+
+def _search_root_moves(settings, state, moves, deadline):
+    """Search a subset of the root moves of a position by iterative deepening
+    in a worker process of a parallel AlphaBetaPlayer.
+
+    Parameters
+    ----------
+    settings : tuple
+        (board_class, score_fn, timeout, tt_size_mb, pvs) of the parallel
+        player.
+
+    state : tuple
+        The position, as returned by `Board.get_state()`, with the parallel
+        player to move.
+
+    moves : list<int>
+        The root moves to search, as cell indices.
+
+    deadline : float
+        The `time.time()` at which the search stops.
+
+    Returns
+    -------
+    list<(int, float, int)>
+        (depth, score, move) for every completed depth.
+    """
+    global _worker
+    if _worker is None or _worker[0] != settings:
+        board_class, score_fn, timeout, tt_size_mb, pvs = settings
+        _worker = (settings, AlphaBetaPlayer(score_fn=score_fn,
+                                             timeout=timeout,
+                                             tt_size_mb=tt_size_mb, pvs=pvs),
+                   object())
+    settings, player, opponent = _worker
+    board_class = settings[0]
+    if state[5]:
+        game = board_class.from_state(opponent, player, state)
+    else:
+        game = board_class.from_state(player, opponent, state)
+    return player._search_root_moves(
+        game, moves, lambda: 1000. * (deadline - time.time()))
+
+
 def custom_score(game, player):
     """Calculate the heuristic value of a game state from the point of view
     of the given player.
@@ -52,31 +120,26 @@ def custom_score(game, player):
         The heuristic value of the current game state to the specified player.
     """
 
-    if game.is_loser(player):
-        return float('-inf')
-
-    if game.is_winner(player):
-        return float('inf')
+    utility = game.utility(player)
+    if utility:
+        return utility
 
-    player_legal_moves = game.get_legal_moves(player)
-    player_moves_length = len(player_legal_moves)
-    for legal_move in player_legal_moves:
-        next_phase = game.forecast_move(legal_move)
-        # On next phase the player is the opponent
-        next_phase_player = next_phase.get_opponent(next_phase.active_player)
-        next_phase_moves = next_phase.get_legal_moves(next_phase_player)
-        player_moves_length += len(next_phase_moves)
+    # Separated players can no longer interfere, so the game is solved exactly
+    score = endgame_score(game, player)
+    if score is not None:
+        return score
 
-    opponent_legal_moves = game.get_legal_moves(game.get_opponent(player))
-    opponent_moves_length = len(opponent_legal_moves)
-    for legal_move in opponent_legal_moves:
-        next_phase = game.forecast_move(legal_move)
-        # On the next phase the opponent is the active player
-        # So by default get_legal_moves use the active player
-        opponent_next_legal_moves = next_phase.get_legal_moves()
-        opponent_moves_length += len(opponent_next_legal_moves)
+    # The next phase of every legal move is counted without copying the
+    # board (see Board.forecast_mobility): on the next phase of a move the
+    # player who moved is the active player of this state, and the opponent
+    # is the player who moves next
+    player_moves, player_next_moves = game.forecast_mobility(
+        player, game.active_player)
+    opponent_moves, opponent_next_moves = game.forecast_mobility(
+        game.get_opponent(player), game.inactive_player)
 
-    return float(player_moves_length - opponent_moves_length)
+    return float(player_moves + player_next_moves -
+                 opponent_moves - opponent_next_moves)
 
 
 def custom_score_2(game, player):
@@ -106,16 +169,16 @@ def custom_score_2(game, player):
     float
         The heuristic value of the current game state to the specified player.
     """
-    if game.is_loser(player):
-        return float("-inf")
+    utility, own_moves, opp_moves = game.mobility(player)
+    if utility:
+        return utility
 
-    if game.is_winner(player):
-        return float("inf")
+    # Separated players can no longer interfere, so the game is solved exactly
+    score = endgame_score(game, player)
+    if score is not None:
+        return score
 
     opp_player = game.get_opponent(player)
-    own_moves = len(game.get_legal_moves(player))
-    opp_moves = len(game.get_legal_moves(opp_player))
-
     distance = calculate_distance(game, player, opp_player)
     return float((own_moves + distance) - opp_moves)
 
@@ -147,11 +210,14 @@ def custom_score_3(game, player):
     float
         The heuristic value of the current game state to the specified player.
     """
-    if game.is_loser(player):
-        return float("-inf")
+    utility = game.utility(player)
+    if utility:
+        return utility
 
-    if game.is_winner(player):
-        return float("inf")
+    # Separated players can no longer interfere, so the game is solved exactly
+    score = endgame_score(game, player)
+    if score is not None:
+        return score
 
     opponent_location = game.get_player_location(game.get_opponent(player))
     if opponent_location is None:
@@ -164,6 +230,360 @@ def custom_score_3(game, player):
     return float(-abs(sum(opponent_location) - sum(player_location)))
 
 
+# Bound types of the scores stored in a TranspositionTable
+TT_EXACT = 0
+TT_LOWER = 1
+TT_UPPER = 2
+
+# Depth recorded for terminal states, whose utility is exact at any depth
+TT_TERMINAL_DEPTH = 255
+
+
+class TranspositionTable:
+    """Fixed-size table of search results keyed by the Zobrist key of a
+    position (`Board.zobrist_key`), so that positions reached again through
+    a different move order or in a later iterative-deepening pass are not
+    searched twice.
+
+    Each entry records the key, the searched depth, the score, whether the
+    score is exact or a lower/upper bound, and the best move (a cell index,
+    or -1). Entries are kept in flat `array` columns sized to the memory
+    budget, in buckets of two slots: the first slot keeps the deepest result
+    seen for the bucket and the second is always overwritten, so shallow
+    results cannot push out expensive deep ones.
+
+    Every entry is tagged with the search that stored it (see new_search()).
+    Entries left by the previous `max_age` searches are still returned, so
+    the results of one turn are reused on the next turn of the same game,
+    but they are evicted in favour of any result of the current search.
+
+    Parameters
+    ----------
+    size_mb : float (optional)
+        Memory budget for the table in megabytes.
+
+    max_age : int (optional)
+        The number of previous searches whose entries are still used.
+    """
+    ENTRY_BYTES = 23  # key (8), score (8), move (4), depth, bound and age (1)
+
+    def __init__(self, size_mb=8, max_age=0):
+        buckets = max(1, int(size_mb * 2 ** 20) // (2 * self.ENTRY_BYTES))
+        buckets = 1 << (buckets.bit_length() - 1)
+        self.size = 2 * buckets
+        self._mask = buckets - 1
+        self._keys = array('Q', bytes(8 * self.size))
+        self._scores = array('d', bytes(8 * self.size))
+        self._moves = array('i', bytes(4 * self.size))
+        self._depths = array('B', bytes(self.size))
+        self._bounds = array('B', bytes(self.size))
+        self._ages = array('B', bytes(self.size))
+        self._age = 1
+        self.max_age = max_age
+
+    def new_search(self):
+        """Start a new search; entries stored by more than `max_age` previous
+        searches are ignored from now on.
+        """
+        self._age += 1
+        if self._age > 255:
+            self.clear()
+
+    def clear(self):
+        """Remove every entry from the table. """
+        self._ages = array('B', bytes(self.size))
+        self._age = 1
+
+    def lookup(self, key):
+        """Return the entry stored for the key as a tuple (depth, score,
+        bound, move), or None if there is no entry for the key.
+        """
+        slot = (key & self._mask) << 1
+        for i in (slot, slot + 1):
+            # An age of 0 marks an empty slot
+            if (self._keys[i] == key and self._ages[i] and
+                    self._age - self._ages[i] <= self.max_age):
+                return (self._depths[i], self._scores[i], self._bounds[i],
+                        self._moves[i])
+        return None
+
+    def store(self, key, depth, score, bound, move):
+        """Record the result of searching the position with the given key to
+        the given depth.
+        """
+        slot = (key & self._mask) << 1
+        if (self._ages[slot] != self._age or self._keys[slot] == key or
+                depth >= self._depths[slot]):
+            i = slot
+        else:
+            i = slot + 1
+        self._keys[i] = key
+        self._scores[i] = score
+        self._moves[i] = move
+        self._depths[i] = depth
+        self._bounds[i] = bound
+        self._ages[i] = self._age
+
+
+class MoveOrdering:
+    """Order the moves searched at each node of an alpha-beta search so that
+    the moves most likely to cause a cutoff are tried first.
+
+    Moves are cell indices. At every node the first move is the principal
+    variation move (the best move found for the node by a previous, shallower
+    iteration, e.g. from a transposition table), followed by the killer
+    moves that recently caused cutoffs at the same ply, and then by the
+    remaining moves in decreasing order of their history score, which grows
+    by depth ** 2 every time a move causes a cutoff.
+
+    The class does not depend on any particular player, so any search can
+    use it by calling order() before expanding a node and cutoff() when a
+    move causes a cutoff.
+
+    Parameters
+    ----------
+    num_killers : int (optional)
+        The number of killer moves remembered for each ply.
+    """
+
+    def __init__(self, num_killers=2):
+        self.num_killers = num_killers
+        self._killers = []
+        # History scores for the maximizing (0) and minimizing (1) sides
+        self._history = (defaultdict(int), defaultdict(int))
+
+    def new_search(self, plies=None):
+        """Prepare for a search from a new root position. History scores are
+        halved, so recent cutoffs weigh more than old ones.
+
+        Parameters
+        ----------
+        plies : int (optional)
+            The number of moves played since the root of the previous search;
+            the killer moves of deeper plies are kept and shifted to match
+            the new root. If None, all killer moves are forgotten.
+        """
+        if plies is None:
+            self._killers = []
+        else:
+            del self._killers[:plies]
+        for history in self._history:
+            for move in history:
+                history[move] >>= 1
+
+    def clear(self):
+        """Forget all killer moves and history scores. """
+        self._killers = []
+        for history in self._history:
+            history.clear()
+
+    def order(self, moves, ply, side, pv_move=-1):
+        """Sort a list of moves in-place and return it.
+
+        Parameters
+        ----------
+        moves : list<int>
+            The legal moves at the node.
+
+        ply : int
+            The distance of the node from the root of the search; killer
+            moves are not used if it is negative (i.e., unknown).
+
+        side : int
+            0 if the node maximizes the score, 1 if it minimizes it.
+
+        pv_move : int (optional)
+            The move to search first, or -1.
+        """
+        moves.sort(key=self._history[side].__getitem__, reverse=True)
+        if 0 <= ply < len(self._killers):
+            for killer in reversed(self._killers[ply]):
+                if killer in moves:
+                    moves.remove(killer)
+                    moves.insert(0, killer)
+        if pv_move >= 0 and pv_move in moves:
+            moves.remove(pv_move)
+            moves.insert(0, pv_move)
+        return moves
+
+    def cutoff(self, move, ply, side, depth):
+        """Record that the move caused a cutoff at a node of the given ply and
+        remaining depth.
+        """
+        self._history[side][move] += depth * depth
+        if ply < 0:
+            return
+        while len(self._killers) <= ply:
+            self._killers.append([])
+        killers = self._killers[ply]
+        if move not in killers:
+            killers.insert(0, move)
+            del killers[self.num_killers:]
+
+
+class EvalCache:
+    """Bounded cache of the values of a score function, keyed by the Zobrist
+    key of the position (`Board.zobrist_key`) and the player whose point of
+    view is scored, so that the leaves searched again by every iteration of
+    iterative deepening are evaluated only once.
+
+    An EvalCache is called like the score function it wraps, so it can be
+    passed as the `score_fn` of any player; see also `cached_score()`. When
+    the cache holds `size` entries, the least recently used entry is evicted.
+    The cache is only correct for score functions that depend on nothing but
+    the position and the player.
+
+    Parameters
+    ----------
+    score_fn : callable
+        The score function, called as score_fn(game, player).
+
+    size : int (optional)
+        The maximum number of cached values.
+
+    Attributes
+    ----------
+    hits : int
+        The number of calls answered from the cache.
+
+    misses : int
+        The number of calls that evaluated the score function.
+    """
+
+    def __init__(self, score_fn, size=2 ** 16):
+        if size < 1:
+            raise ValueError("The cache size must be positive: {}".format(size))
+        self.score_fn = score_fn
+        self.size = size
+        self.__name__ = getattr(score_fn, "__name__", type(self).__name__)
+        self.__doc__ = getattr(score_fn, "__doc__", None)
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __call__(self, game, player):
+        # The key is even or odd as the player does or does not hold the
+        # initiative (which the Zobrist key covers)
+        key = (game.zobrist_key << 1) | (player is game.active_player)
+        entries = self._entries
+        score = entries.get(key)
+        if score is not None:
+            self.hits += 1
+            try:
+                entries.move_to_end(key)
+            except KeyError:  # evicted by a pondering thread
+                pass
+            return score
+        self.misses += 1
+        score = self.score_fn(game, player)
+        entries[key] = score
+        if len(entries) > self.size:
+            entries.popitem(last=False)
+        return score
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def hit_rate(self):
+        """The share of the calls answered from the cache. """
+        calls = self.hits + self.misses
+        return self.hits / calls if calls else 0.
+
+    def clear(self):
+        """Remove every entry and reset the hit and miss counts. """
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    # The entries are not sent to the worker processes of a parallel
+    # AlphaBetaPlayer, and copies of a cache compare equal, so that the
+    # workers keep their search player between tasks
+    def __getstate__(self):
+        return {"score_fn": self.score_fn, "size": self.size}
+
+    def __setstate__(self, state):
+        self.__init__(state["score_fn"], state["size"])
+
+    def __eq__(self, other):
+        return (type(other) is type(self) and
+                (self.score_fn, self.size) == (other.score_fn, other.size))
+
+    def __hash__(self):
+        return hash((self.score_fn, self.size))
+
+    def __repr__(self):
+        return "{}({}, size={}): {} entries, {:.1%} hits".format(
+            type(self).__name__, self.__name__, self.size, len(self),
+            self.hit_rate)
+
+
+def cached_score(score_fn=None, size=2 ** 16):
+    """Decorate a score function with an `EvalCache` of the given size, as
+    either @cached_score or @cached_score(size=...).
+    """
+    if score_fn is None:
+        return lambda score_fn: EvalCache(score_fn, size)
+    return EvalCache(score_fn, size)
+
+
+class SearchStats:
+    """Statistics of the search run by one call to the get_move() method of
+    a player; every call replaces `player.stats` with a new object, which
+    can be read once the move is returned.
+
+    Parameters
+    ----------
+    start_time : float (optional)
+        The time left (in milliseconds) when get_move() was called.
+
+    Attributes
+    ----------
+    nodes : int
+        The number of nodes (game states) visited by the search.
+
+    leaves : int
+        The number of states evaluated with the score function.
+
+    depth : int
+        The depth of the deepest search iteration that was completed (0 if
+        the move was not searched, e.g. because it came from an opening book
+        or an endgame solver).
+
+    cutoffs : dict<int, int>
+        The number of beta cutoffs by the index of the move that caused them
+        in the (ordered) list of moves of the node; with a good move ordering
+        most cutoffs are caused by the first move.
+
+    time_left : float
+        The time left (in milliseconds) when get_move() returned.
+
+    elapsed : float
+        The time (in milliseconds) spent in get_move().
+    """
+
+    def __init__(self, start_time=0.):
+        self.nodes = 0
+        self.leaves = 0
+        self.depth = 0
+        self.cutoffs = {}
+        self.time_left = start_time
+        self.elapsed = 0.
+        self._start_time = start_time
+
+    @property
+    def nodes_per_second(self):
+        """The number of nodes visited per second of search. """
+        if self.elapsed <= 0:
+            return 0.
+        return 1000. * self.nodes / self.elapsed
+
+    def finish(self, time_left):
+        """Record the time left when get_move() returns. """
+        self.time_left = time_left
+        self.elapsed = self._start_time - time_left
+
+
 class IsolationPlayer:
     """Base class for minimax and alphabeta agents -- this class is never
     constructed or tested directly.
@@ -192,6 +612,7 @@ class IsolationPlayer:
         self.score = score_fn
         self.time_left = None
         self.TIMER_THRESHOLD = timeout
+        self.stats = SearchStats()
 
 
 class MinimaxPlayer(IsolationPlayer):
@@ -229,6 +650,7 @@ class MinimaxPlayer(IsolationPlayer):
             (-1, -1) if there are no available legal moves.
         """
         self.time_left = time_left
+        self.stats = SearchStats(time_left())
 
         # Initialize the best move so that this function returns something
         # in case the search fails due to timeout
@@ -237,11 +659,13 @@ class MinimaxPlayer(IsolationPlayer):
         try:
             # The try/except block will automatically catch the exception
             # raised when the timer is about to expire.
-            return self.minimax(game, self.search_depth)
+            best_move = self.minimax(game, self.search_depth)
+            self.stats.depth = self.search_depth
 
         except SearchTimeout:
             pass  # Handle any actions required after timeout as needed
 
+        self.stats.finish(time_left())
         # Return the best move from the last completed search iteration
         return best_move
 
@@ -287,8 +711,10 @@ class MinimaxPlayer(IsolationPlayer):
         if self.time_left() < self.TIMER_THRESHOLD:
             raise SearchTimeout()
 
-        results = self.min_max_common(game, depth, True)
-        best_move = results[1]
+        # Search on a private copy: moves are applied and undone in-place,
+        # and a timeout may leave the copy with moves still applied
+        results = self.min_max_common(game.copy(), depth, True)
+        best_move = _index_to_move(game, results[1])
         return best_move
 
     def min_max_common(self, game, depth, get_max_value):
@@ -304,20 +730,23 @@ class MinimaxPlayer(IsolationPlayer):
             Indicates if it will try to get the max value or the min value
 
         Returns the highest(get_max_value=True) or lowest(get_max_value=False)
-        score/move tuple found in game
+        score/move tuple found in game; moves are cell indices (see
+        `Board.legal_move_indices`), and -1 if there are no legal moves
         """
         if self.time_left() < self.TIMER_THRESHOLD:
             raise SearchTimeout()
+        self.stats.nodes += 1
 
         # Finally we are were we wanted! The max_depth
         if depth == 0:
             # So lets get the score
+            self.stats.leaves += 1
             return self.score(game, self), None
 
-        # Terminal test
-        legal_moves = game.get_legal_moves()
+        # Terminal test; symmetric opening placements are only expanded once
+        legal_moves = game.distinct_move_indices()
         if not legal_moves:
-            return (game.utility(self), (-1, -1))
+            return (game.utility(self), -1)
 
         # Are we going for the max value or the min value?
         if get_max_value is True:
@@ -330,10 +759,11 @@ class MinimaxPlayer(IsolationPlayer):
             raise SearchTimeout()
 
         highest_score = float('-inf')
-        selected_move = (-1, -1)
+        selected_move = -1
         for move in legal_moves:
-            results = self.min_max_common(
-                game.forecast_move(move), depth - 1, False)
+            game.apply_index(move)
+            results = self.min_max_common(game, depth - 1, False)
+            game.undo_move()
             score = results[0]
             highest_score, selected_move = max(
                 (highest_score, selected_move), (score, move))
@@ -344,10 +774,11 @@ class MinimaxPlayer(IsolationPlayer):
             raise SearchTimeout()
 
         lowest_score = float('inf')
-        selected_move = (-1, -1)
+        selected_move = -1
         for move in legal_moves:
-            results = self.min_max_common(
-                game.forecast_move(move), depth - 1, True)
+            game.apply_index(move)
+            results = self.min_max_common(game, depth - 1, True)
+            game.undo_move()
             score = results[0]
             lowest_score, selected_move = min(
                 (lowest_score, selected_move), (score, move))
@@ -358,7 +789,146 @@ class AlphaBetaPlayer(IsolationPlayer):
     """Game-playing agent that chooses a move using iterative deepening minimax
     search with alpha-beta pruning. You must finish and test this player to
     make sure it returns a good move before the search time limit expires.
+
+    Parameters
+    ----------
+    tt_size_mb : float (optional)
+        Memory budget in megabytes of the transposition table used to reuse
+        the results of positions that were already searched; 0 disables the
+        table. The table and the move ordering are kept from one turn to the
+        next, so a turn starts from the results of the previous turns of the
+        same game; both are reset when a new game is detected.
+
+    ordering : MoveOrdering or bool (optional)
+        The move ordering used at every node. If None, a new MoveOrdering is
+        created; False searches the moves in the order they are generated.
+
+    pvs : bool (optional)
+        If True, use principal variation search: once a move has raised the
+        lower (or lowered the upper) bound of a node, the remaining moves are
+        first searched with a null window that only tells whether they are
+        better, and are searched again with the full window if they are.
+
+    aspiration_window : float (optional)
+        If positive, every iterative deepening iteration after the first is
+        searched with the window (score - aspiration_window, score +
+        aspiration_window) around the score of the previous iteration, and
+        searched again with the full window if the score falls outside of
+        it. 0 (the default) always searches with the full window.
+
+    workers : int (optional)
+        If greater than 1, every turn also splits the root moves among this
+        many worker processes (started on the first turn and kept until
+        close() is called), each running its own iterative deepening search
+        until the turn's deadline. The deepest result completed by every
+        worker replaces the result of the search in this process if it is
+        deeper; workers that have not reported back by the time the turn
+        ends are ignored. The score function must be picklable (e.g., a
+        module-level function).
+
+    book : opening_book.OpeningBook or bool (optional)
+        The opening book consulted before searching; a state found in the
+        book is answered with the book move without any search. If None,
+        the book shipped with the project (opening_book.bin) is used if it
+        exists and was built with the same score function as the player's,
+        so that the book plays the moves of the player's own heuristic;
+        False disables the book.
+
+    ponder_ms : float (optional)
+        If positive, after choosing a move the player keeps searching the
+        position that move leads to in a background thread ("pondering")
+        while the opponent thinks, for at most this many milliseconds; the
+        next call to get_move() stops the thread and starts from the results
+        it stored in the transposition table. The thread shares the Python
+        interpreter with the opponent when both run in the same process, and
+        the search of a pondering player stops PONDER_MARGIN_MS earlier to
+        leave time to start it. 0 (the default) disables pondering.
+
+    The remaining parameters are described in IsolationPlayer.
     """
+    # Number of previous turns whose transposition table entries are reused
+    TT_MAX_AGE = 2
+
+    def __init__(self, search_depth=3, score_fn=custom_score, timeout=10.,
+                 tt_size_mb=8, ordering=None, pvs=False, aspiration_window=0.,
+                 workers=0, book=None, ponder_ms=0):
+        super().__init__(search_depth, score_fn, timeout)
+        self.tt = (TranspositionTable(tt_size_mb, self.TT_MAX_AGE)
+                   if tt_size_mb else None)
+        if ordering is None:
+            ordering = MoveOrdering()
+        self.ordering = ordering or None
+        self._root_depth = 0
+        self._root_move = -1
+        self._root_score = None
+        self._last_game = None
+        self.pvs = pvs
+        self.aspiration_window = aspiration_window
+        self.tt_size_mb = tt_size_mb
+        self.workers = workers
+        self._pool = None
+        self.ponder_ms = ponder_ms
+        self._ponder_thread = None
+        self._ponder_stop = None
+        # Search counters, never reset; get_move() reports their growth
+        # during the turn in `stats`
+        self._nodes = 0
+        self._leaves = 0
+        self._cutoffs = defaultdict(int)
+        self._next_clock_check = 0
+        if book is None:
+            book = load_book()
+            if book is not None and book.heuristic != heuristic_name(score_fn):
+                book = None
+        self.book = book or None
+
+    # Time (in milliseconds) reserved for collecting the results of the
+    # worker processes of a parallel search
+    PARALLEL_MARGIN_MS = 10.
+
+    # Time (in milliseconds) reserved for starting the pondering thread, and
+    # the delay before the thread starts searching, so that get_move() can
+    # return without competing with it for the interpreter
+    PONDER_MARGIN_MS = 5.
+    PONDER_DELAY_MS = 5.
+
+    # Number of nodes searched between two checks of time_left()
+    CLOCK_CHECK_INTERVAL = 32
+
+    def new_game(self):
+        """Forget the results of previous searches; called by get_move() when
+        it detects that a new game has started.
+        """
+        self.stop_pondering()
+        if self.tt is not None:
+            self.tt.clear()
+        if self.ordering is not None:
+            self.ordering.clear()
+        self._last_game = None
+
+    def _start_turn(self, game):
+        """Prepare the search data for a turn, keeping what was learned on
+        the previous turns of the same game.
+        """
+        # The player moves on turns of the same parity, and move_count never
+        # decreases during a game
+        signature = (game.width, game.height, game.move_count % 2)
+        plies = None
+        if self._last_game is not None:
+            last_signature, last_move_count = self._last_game
+            if (signature != last_signature or
+                    game.move_count < last_move_count):
+                self.new_game()
+            else:
+                plies = game.move_count - last_move_count
+        self._last_game = (signature, game.move_count)
+
+        if self.tt is not None:
+            self.tt.new_search()
+        if self.ordering is not None:
+            self.ordering.new_search(plies)
+        self._root_move = -1
+        self._root_score = None
 
     def get_move(self, game, time_left):
         """Search for the best move from the available legal moves and return a
@@ -390,38 +960,284 @@ class AlphaBetaPlayer(IsolationPlayer):
             Board coordinates corresponding to a legal move; may return
             (-1, -1) if there are no available legal moves.
         """
+        self.stop_pondering()
+        self.stats = SearchStats(time_left())
+        start_counts = (self._nodes, self._leaves, dict(self._cutoffs))
+        search_time_left = time_left
+        if self.ponder_ms > 0:
+            search_time_left = lambda: time_left() - self.PONDER_MARGIN_MS
+        self.time_left = search_time_left
+
+        try:
+            legal_moves = game.get_legal_moves()
+            if not legal_moves:
+                return -1, -1
+
+            # Once the players are separated, the longest path wins
+            move = endgame_move(game)
+            if move is not None:
+                return game.index_to_move(move)
+
+            self._start_turn(game)
+
+            # States in the opening book need no search
+            best_move = None
+            if self.book is not None:
+                best_move = self.book.lookup(game)
+            if best_move not in legal_moves:
+                best_move = self._search(game, legal_moves, search_time_left)
+        finally:
+            self._record_stats(start_counts, time_left)
+
+        if self.ponder_ms > 0:
+            self._start_pondering(game, best_move)
+
+        # Best move from the last recursive search iteration
+        return best_move
+
+    def _record_stats(self, start_counts, time_left):
+        """Fill in `stats` with the growth of the search counters since they
+        were (nodes, leaves, cutoffs) = start_counts, and the time left on
+        the turn's clock.
+        """
+        stats = self.stats
+        nodes, leaves, cutoffs = start_counts
+        stats.nodes = self._nodes - nodes
+        stats.leaves = self._leaves - leaves
+        stats.cutoffs = {index: count - cutoffs.get(index, 0)
+                         for index, count in self._cutoffs.items()
+                         if count != cutoffs.get(index, 0)}
+        stats.finish(time_left())
+
+    def _start_parallel_search(self, game):
+        """Split the root moves among the worker processes, starting them if
+        needed, and return the list of pending results.
+        """
+        if self._pool is None:
+            self._pool = multiprocessing.Pool(self.workers)
+        moves = game.distinct_move_indices()
+        if self._root_move in moves:
+            moves.remove(self._root_move)
+            moves.insert(0, self._root_move)
+
+        settings = (type(game), self.score, self.TIMER_THRESHOLD,
+                    self.tt_size_mb, self.pvs)
+        state = game.get_state()
+        deadline = time.time() + (self.time_left() - self.TIMER_THRESHOLD -
+                                  self.PARALLEL_MARGIN_MS) / 1000.
+        return [self._pool.apply_async(_search_root_moves,
+                                       (settings, state, moves[i::self.workers],
+                                        deadline))
+                for i in range(min(self.workers, len(moves)))]
+
+    def _collect_parallel_search(self, tasks, completed):
+        """Wait for the results of the worker processes until the turn's
+        deadline, and return the best root move at the deepest depth that
+        every worker completed, or -1 if that is not deeper than `completed`.
+        """
+        results = []
+        for task in tasks:
+            task.wait(max(0., self.time_left() - self.TIMER_THRESHOLD) / 1000.)
+            if not task.ready() or not task.successful():
+                return -1
+            results.append(task.get())
+        depth = min(len(result) for result in results)
+        if depth <= completed:
+            return -1
+        score, move = max((result[depth - 1][1:] for result in results),
+                          key=lambda result: result[0])
+        return move
+
+    def _search_root_moves(self, game, moves, time_left):
+        """Search the given root moves of the game by iterative deepening
+        until time_left() runs out (see `_search_root_moves` at module level).
+        """
+        self._start_turn(game)
         self.time_left = time_left
+        results = []
+        try:
+            depth = 0
+            max_depth = game.count_blank_spaces()
+            while depth < max_depth:
+                depth += 1
+                self._root_depth = depth
+                score, move = self.alpha_beta_common(
+                    game.copy(), depth, float("-inf"), float("inf"), True,
+                    root_moves=moves)
+                if move < 0:
+                    move = moves[0]
+                results.append((depth, score, move))
+                # The best move is searched first in the next iteration
+                moves.remove(move)
+                moves.insert(0, move)
+        except SearchTimeout:
+            pass
+        return results
+
+    def close(self):
+        """Stop pondering and shut down the worker processes, if any. """
+        self.stop_pondering()
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool = None
+
+    def stop_pondering(self):
+        """Stop the background search started after the last move, if any,
+        and wait for it to finish.
+        """
+        if self._ponder_thread is not None:
+            self._ponder_stop.set()
+            self._ponder_thread.join()
+            self._ponder_thread = None
+
+    def _start_pondering(self, game, move):
+        """Start searching the position after the move in a background
+        thread, with the opponent to move.
+        """
+        board = game.copy()
+        board.apply_move(move)
+        # The next turn's killer moves are one ply closer to the root
+        self._last_game = (self._last_game[0], board.move_count)
+
+        stop = threading.Event()
+        deadline = time.perf_counter() + self.ponder_ms / 1000.
+
+        def time_left():
+            if stop.is_set():
+                return float("-inf")
+            return 1000. * (deadline - time.perf_counter())
+
+        def ponder():
+            # Let get_move() return before searching
+            if not stop.wait(self.PONDER_DELAY_MS / 1000.):
+                self._ponder(board, time_left)
+
+        self._ponder_stop = stop
+        self._ponder_thread = threading.Thread(target=ponder, daemon=True)
+        self._ponder_thread.start()
+
+    def _ponder(self, game, time_left):
+        """Search a position with the opponent to move by iterative deepening
+        until time_left() runs out, storing the results in the transposition
+        table.
+        """
+        self.time_left = time_left
+        if self.tt is not None:
+            self.tt.new_search()
+        if self.ordering is not None:
+            self.ordering.new_search(1)
+        self._root_move = -1
+        try:
+            depth = 0
+            max_depth = game.count_blank_spaces()
+            while depth < max_depth:
+                depth += 1
+                self._root_depth = depth
+                self.alpha_beta_common(game, depth, float("-inf"),
+                                       float("inf"), False)
+        except SearchTimeout:
+            pass
 
-        legal_moves = game.get_legal_moves()
-        if not legal_moves:
-            return -1, -1
+    def _search(self, game, legal_moves, time_left):
+        """Choose a move for get_move() by iterative deepening, also running
+        the parallel search if it is enabled.
+        """
+        # Hand the root moves to the worker processes, and stop the search
+        # in this process early enough to collect their results
+        tasks = None
+        if self.workers > 1:
+            tasks = self._start_parallel_search(game)
+            self.time_left = lambda: time_left() - self.PARALLEL_MARGIN_MS
 
         # Initialize the best move so that this function returns something
         # in case the search fails due to timeout
         best_move = legal_moves[0]
+        completed = 0
         try:
             # The try/except block will automatically catch the exception
             # raised when the timer is about to expire.
 
-            # Depth used for iterative deepening
-            depth = 0
-            # while True:
-            inf = float('inf')
-            while depth < inf:
+            # Depth used for iterative deepening; if the previous turn already
+            # found the exact value of this position, deepening resumes from
+            # the depth it was searched to
+            depth = completed = self._resume_depth(game)
+            if depth:
+                best_move = _index_to_move(game, self._root_move)
+            # The game ends before every blank space is filled, so deeper
+            # searches cannot change the result
+            max_depth = game.count_blank_spaces()
+            last_nodes = 0
+            while depth < max_depth:
+                start_time, start_nodes = self.time_left(), self._nodes
                 depth += 1
-                best_move = self.alphabeta(game, depth)
+                best_move = self.aspiration_search(game, depth)
+                completed = depth
+
+                # The next iteration is expected to cost the effective
+                # branching factor (the growth in nodes from the previous
+                # iteration) times this one; an iteration that cannot finish
+                # would be thrown away, so stop instead
+                elapsed = start_time - self.time_left()
+                nodes = self._nodes - start_nodes
+                if last_nodes and nodes > last_nodes:
+                    expected = elapsed * nodes / last_nodes
+                    if expected > self.time_left() - self.TIMER_THRESHOLD:
+                        break
+                last_nodes = nodes
 
         except SearchTimeout:
             pass
 
+        self.stats.depth = completed
+        if tasks:
+            self.time_left = time_left
+            move = self._collect_parallel_search(tasks, completed)
+            if move >= 0:
+                best_move = game.index_to_move(move)
+
         # Safety check
         if best_move == (-1, -1) and legal_moves:
             # Not giving up, we fight till the end!
-            return legal_moves[0]
-
-        # Best move from the last recursive search iteration
+            best_move = legal_moves[0]
         return best_move
 
+    def _resume_depth(self, game):
+        """Return the depth to which the previous turns searched the current
+        position exactly, and remember the best move they found; 0 if it
+        was not searched.
+        """
+        if self.tt is None:
+            return 0
+        entry = self.tt.lookup(game.zobrist_key)
+        if entry is None:
+            return 0
+        depth, _, bound, move = entry
+        if (bound != TT_EXACT or depth == TT_TERMINAL_DEPTH or
+                move not in game.legal_move_indices()):
+            return 0
+        self._root_move = move
+        return depth
+
+    def aspiration_search(self, game, depth):
+        """Run one iteration of iterative deepening: search the game to the
+        given depth within the aspiration window around the score of the
+        previous iteration (see `aspiration_window`), and again with the
+        full window if the score falls outside of it.
+
+        Returns
+        -------
+        (int, int)
+            The board coordinates of the best move found by the search
+        """
+        score = self._root_score
+        window = self.aspiration_window
+        if window > 0 and score is not None and abs(score) != float("inf"):
+            alpha, beta = score - window, score + window
+            best_move = self.alphabeta(game, depth, alpha, beta)
+            if alpha < self._root_score < beta:
+                return best_move
+        return self.alphabeta(game, depth)
+
     def alphabeta(self, game, depth, alpha=float("-inf"), beta=float("inf")):
         """Implement depth-limited minimax search with alpha-beta pruning as
         described in the lectures.
@@ -470,79 +1286,402 @@ class AlphaBetaPlayer(IsolationPlayer):
         if self.time_left() < self.TIMER_THRESHOLD:
             raise SearchTimeout()
 
-        results = self.alpha_beta_common(game, depth, alpha, beta, True)
-        best_move = results[1]
+        # Search on a private copy: moves are applied and undone in-place,
+        # and a timeout may leave the copy with moves still applied
+        self._root_depth = depth
+        results = self.alpha_beta_common(game.copy(), depth, alpha, beta,
+                                         True)
+        self._root_score = results[0]
+        if results[1] is not None and results[1] >= 0:
+            self._root_move = results[1]
+        best_move = _index_to_move(game, results[1])
         return best_move
 
-    def alpha_beta_common(self, game, depth, alpha, beta, get_max_value):
-        """Common code base for min_value and max_value
-            Checks for depth in order to return the score
-            or continue the recursive search also have
-            the terminal test that consist to check if there
-            are legal moves available
+    def alpha_beta_common(self, game, depth, alpha, beta, get_max_value,
+                          root_moves=None):
+        """Search the game to the given depth within the window (alpha, beta)
+        with the transposition table, move ordering and principal variation
+        search of the player, as a single loop over an explicit stack of
+        nodes instead of recursive calls. Moves are applied to the game and
+        taken back in-place.
+
+        The loop is written in negamax form: every node is searched from the
+        point of view of its active player, within the window (alpha, beta)
+        negated on the min nodes, and the score of a child is negated when it
+        is passed to its parent. Scores read from or stored in the
+        transposition table, and the returned score, are always from the
+        point of view of this player.
 
         Parameters
         ----------
-        get_max_value: int
+        get_max_value: bool
             Indicates if it will try to get the max value or the min value
 
+        root_moves : list<int> (optional)
+            If given, only these moves of the root are searched, in this
+            order; the root is then neither looked up in nor stored in the
+            transposition table.
+
         Returns the highest(get_max_value=True) or lowest(get_max_value=False)
-        score/move tuple found in game
+        score/move tuple found in game; moves are cell indices (see
+        `Board.legal_move_indices`), and -1 if there are no legal moves or
+        no move is better than the window (None at depth 0)
         """
-        if self.time_left() < self.TIMER_THRESHOLD:
-            raise SearchTimeout()
+        score_fn = self.score
+        tt = self.tt
+        ordering = self.ordering
+        pvs = self.pvs
+        root_depth = self._root_depth
+        time_left = self.time_left
+        threshold = self.TIMER_THRESHOLD
+        clock_interval = self.CLOCK_CHECK_INTERVAL
+        nextafter = math.nextafter
+        apply_index = game.apply_index
+        undo_move = game.undo_move
+        neg_inf = float("-inf")
+        nodes = self._nodes
+        leaves = self._leaves
+        cutoffs = self._cutoffs
+        next_clock_check = self._next_clock_check
+
+        side = 0 if get_max_value else 1
+        if side:
+            alpha, beta = -beta, -alpha
+        key = None
+
+        # The state of the node whose moves are being searched is held in
+        # local variables, and pushed on the stack while one of its children
+        # is searched: (moves, index of the current move, depth, alpha, beta,
+        # alpha and beta on entry, best score, best move, side, ply, null
+        # window search of the current move, transposition table key)
+        stack = []
+        try:
+            while True:
+                # Enter the node searched to `depth` within (alpha, beta),
+                # with `side` (0 for this player, 1 for the opponent) to move
+                nodes += 1
+                if nodes >= next_clock_check:
+                    next_clock_check = nodes + clock_interval
+                    if time_left() < threshold:
+                        raise SearchTimeout()
+
+                finished = True
+                if depth == 0:
+                    leaves += 1
+                    score, move = score_fn(game, self), None
+                elif root_moves is not None and not stack:
+                    finished = False
+                    moves, i, node_depth, node_side = (
+                        root_moves, 0, depth, side)
+                    ply, alpha0, beta0 = 0, alpha, beta
+                    best, best_move = neg_inf, -1
+                    node_key = None
+                else:
+                    score = None
+                    tt_move = -1
+                    if tt is not None:
+                        key = game.zobrist_key
+                        entry = tt.lookup(key)
+                        if entry is not None:
+                            entry_depth, tt_score, bound, tt_move = entry
+                            if side:
+                                low, high = -beta, -alpha
+                            else:
+                                low, high = alpha, beta
+                            if entry_depth >= depth and (
+                                    bound == TT_EXACT or
+                                    (bound == TT_LOWER and tt_score >= high) or
+                                    (bound == TT_UPPER and tt_score <= low)):
+                                score, move = tt_score, tt_move
+
+                    if score is None:
+                        legal_moves = game.distinct_move_indices()
+                        if not legal_moves:
+                            score, move = game.utility(self), -1
+                            if tt is not None:
+                                tt.store(key, TT_TERMINAL_DEPTH, score,
+                                         TT_EXACT, -1)
+                        else:
+                            ply = root_depth - depth
+                            if tt_move < 0 and ply == 0:
+                                tt_move = self._root_move
+                            if ordering is not None:
+                                ordering.order(legal_moves, ply, side, tt_move)
+                            elif tt_move >= 0 and tt_move in legal_moves:
+                                legal_moves.remove(tt_move)
+                                legal_moves.insert(0, tt_move)
+                            finished = False
+                            moves, i, node_depth, node_side = (
+                                legal_moves, 0, depth, side)
+                            alpha0, beta0 = alpha, beta
+                            best, best_move = neg_inf, -1
+                            node_key = key
+                if finished:
+                    value = -score if side else score
+
+                while True:
+                    if finished:
+                        # Pass the value of the finished node to its parent
+                        if not stack:
+                            return (-value if side else value), move
+                        (moves, i, node_depth, alpha, beta, alpha0, beta0,
+                         best, best_move, node_side, ply, null_window,
+                         node_key) = stack.pop()
+                        value = -value
+                        if (null_window and value > alpha and
+                                nextafter(alpha, beta) < beta):
+                            # The move is better than the best one: search it
+                            # again with the full window
+                            stack.append((moves, i, node_depth, alpha, beta,
+                                          alpha0, beta0, best, best_move,
+                                          node_side, ply, False, node_key))
+                            depth, side = node_depth - 1, 1 - node_side
+                            alpha, beta = -beta, -alpha
+                            break
+                        undo_move()
+                        if value > alpha:
+                            alpha = best = value
+                            best_move = moves[i]
+                        finished = False
+                        if alpha >= beta:
+                            # Let the prune happen
+                            cutoffs[i] += 1
+                            i = len(moves)
+                        else:
+                            i += 1
+
+                    if node_depth == 1:
+                        # The children are leaves: evaluate them in place
+                        while i < len(moves):
+                            apply_index(moves[i])
+                            nodes += 1
+                            if nodes >= next_clock_check:
+                                next_clock_check = nodes + clock_interval
+                                if time_left() < threshold:
+                                    raise SearchTimeout()
+                            leaves += 1
+                            score = score_fn(game, self)
+                            undo_move()
+                            value = -score if node_side else score
+                            if value > alpha:
+                                alpha = best = value
+                                best_move = moves[i]
+                            if alpha >= beta:
+                                cutoffs[i] += 1
+                                break
+                            i += 1
+                    elif i < len(moves):
+                        # Search the next move; once a move has raised alpha,
+                        # the next ones are first searched with a null window
+                        # that only tells whether they are better
+                        apply_index(moves[i])
+                        null_window = pvs and best_move >= 0
+                        stack.append((moves, i, node_depth, alpha, beta,
+                                      alpha0, beta0, best, best_move,
+                                      node_side, ply, null_window, node_key))
+                        depth, side = node_depth - 1, 1 - node_side
+                        if null_window:
+                            alpha, beta = -nextafter(alpha, beta), -alpha
+                        else:
+                            alpha, beta = -beta, -alpha
+                        break
+
+                    # All the moves of the node are searched (or pruned); a
+                    # search of given root moves leaves no trace of the root
+                    if root_moves is None or stack:
+                        if ordering is not None and best >= beta0:
+                            ordering.cutoff(best_move, ply, node_side,
+                                            node_depth)
+                        if tt is not None:
+                            # Scores outside of the window only bound the
+                            # value of the position, as seen by this player
+                            if node_side:
+                                if best >= beta0:
+                                    tt.store(node_key, node_depth, -beta0,
+                                             TT_UPPER, best_move)
+                                elif best <= alpha0:
+                                    tt.store(node_key, node_depth, -alpha0,
+                                             TT_LOWER, best_move)
+                                else:
+                                    tt.store(node_key, node_depth, -best,
+                                             TT_EXACT, best_move)
+                            elif best <= alpha0:
+                                tt.store(node_key, node_depth, alpha0,
+                                         TT_UPPER, best_move)
+                            elif best >= beta0:
+                                tt.store(node_key, node_depth, beta0,
+                                         TT_LOWER, best_move)
+                            else:
+                                tt.store(node_key, node_depth, best,
+                                         TT_EXACT, best_move)
+                    value, move, side = best, best_move, node_side
+                    finished = True
+        finally:
+            self._nodes = nodes
+            self._leaves = leaves
+            self._next_clock_check = next_clock_check
+
+
+class _TreeNode:
+    """A node of the search tree of `MCTSPlayer`: the state reached by
+    `player` making `move` (a cell index) in the state of the parent node.
+
+    Nodes do not point back to their parent, so that a tree holds no
+    reference cycles and is freed as soon as the search returns, instead of
+    waiting for (and slowing down) the cyclic garbage collector.
+    """
+    __slots__ = ('move', 'player', 'children', 'untried', 'visits', 'wins')
 
-        # Finally we are were we wanted! The max_depth
-        if depth == 0:
-            # So lets get the score
-            return self.score(game, self), None
+    def __init__(self, move, player, untried):
+        self.move = move
+        self.player = player
+        self.children = []
+        self.untried = untried  # moves that have no child node yet
+        self.visits = 0
+        self.wins = 0  # rollouts won by `player`
 
-        # Terminal test
-        legal_moves = game.get_legal_moves()
-        if not legal_moves:
-            return (game.utility(self), (-1, -1))
-        # return 10, legal_moves[0]
 
-        # Are we going for the max value or the min value?
-        if get_max_value:
-            return self.alphabeta_max_value(game, legal_moves, depth,
-                                            alpha, beta)
-        else:
-            return self.alphabeta_min_value(game, legal_moves, depth,
-                                            alpha, beta)
+class MCTSPlayer(IsolationPlayer):
+    """Game-playing agent that chooses a move by Monte Carlo tree search,
+    selecting the moves of the search tree with the UCT rule and finishing
+    every iteration with a playout (rollout) to the end of the game.
 
-    def alphabeta_max_value(self, game, legal_moves, depth, alpha, beta):
-        if self.time_left() < self.TIMER_THRESHOLD:
-            raise SearchTimeout()
+    The moves of the tree are played on the game board itself with
+    `Board.apply_index` and taken back with `Board.undo_move`, and the
+    rollouts use `Board.playout`, so no board is copied during the search.
 
-        highest_score = float('-inf')
-        selected_move = (-1, -1)
-        for move in legal_moves:
-            results = self.alpha_beta_common(game.forecast_move(
-                move), depth - 1, alpha, beta, False)
-            score = results[0]
-            if score > alpha:
-                alpha = score
-                highest_score, selected_move = score, move
-            if alpha >= beta:
-                # Let the prune happen
-                break
-        return (highest_score, selected_move)
+    Parameters
+    ----------
+    score_fn : callable (optional)
+        Not used by the search, which scores states by playing them out.
 
-    def alphabeta_min_value(self, game, legal_moves, depth, alpha, beta):
-        if self.time_left() < self.TIMER_THRESHOLD:
-            raise SearchTimeout()
+    timeout : float (optional)
+        Time remaining (in milliseconds) when search is aborted.
 
-        lowest_score = float('inf')
-        selected_move = (-1, -1)
-        for move in legal_moves:
-            results = self.alpha_beta_common(game.forecast_move(
-                move), depth - 1, alpha, beta, True)
-            score = results[0]
-            if score < beta:
-                beta = score
-                lowest_score, selected_move = score, move
-            if beta <= alpha:
-                # Let the prune happen
-                break
-        return (lowest_score, selected_move)
+    exploration : float (optional)
+        The exploration constant C of the UCT rule
+        wins / visits + C * sqrt(ln(parent visits) / visits).
+
+    rollout_policy : str (optional)
+        The policy of `Board.playout` used by the rollouts: "random" or
+        "greedy" (heuristic-guided: the move that leaves the player with the
+        most moves, like `GreedyPlayer` using `open_move_score`).
+
+    seed : hashable (optional)
+        Seed of the random number generator used by the rollouts. If None,
+        the global `random` module is used.
+    """
+
+    def __init__(self, score_fn=custom_score, timeout=10.,
+                 exploration=math.sqrt(2), rollout_policy="random", seed=None):
+        super().__init__(score_fn=score_fn, timeout=timeout)
+        if rollout_policy not in ("random", "greedy"):
+            raise ValueError("Unknown rollout policy: {}".format(rollout_policy))
+        self.exploration = exploration
+        self.rollout_policy = rollout_policy
+        self._rng = random if seed is None else random.Random(seed)
+        self.rollouts = 0  # number of rollouts of the last call to get_move
+
+    def get_move(self, game, time_left):
+        """Search for the best move from the available legal moves and return a
+        result before the time limit expires.
+
+        Parameters
+        ----------
+        game : `isolation.Board`
+            An instance of `isolation.Board` encoding the current state of the
+            game (e.g., player locations and blocked cells).
+
+        time_left : callable
+            A function that returns the number of milliseconds left in the
+            current turn. Returning with any less than 0 ms remaining forfeits
+            the game.
+
+        Returns
+        -------
+        (int, int)
+            The move most visited by the search, or (-1, -1) if there are no
+            legal moves
+        """
+        self.time_left = time_left
+        self.stats = SearchStats(time_left())
+
+        legal_moves = game.get_legal_moves()
+        if not legal_moves:
+            return -1, -1
+
+        # Once the players are separated, the longest path wins
+        move = endgame_move(game)
+        if move is not None:
+            return game.index_to_move(move)
+
+        root = _TreeNode(-1, None, game.legal_move_indices())
+        self.rollouts = 0
+        while time_left() > self.TIMER_THRESHOLD:
+            self.search_iteration(game, root)
+            self.rollouts += 1
+
+        # Every iteration adds a node to the tree and plays one rollout
+        self.stats.nodes = self.stats.leaves = self.rollouts
+        self.stats.finish(time_left())
+        if not root.children:
+            return legal_moves[0]
+        best = max(root.children, key=lambda child: child.visits)
+        return game.index_to_move(best.move)
+
+    def search_iteration(self, game, root):
+        """Run one iteration of the search from the root node, whose state is
+        the current state of the game: select a path down the tree, add a
+        node for a new move, play a rollout from it and update the nodes of
+        the path with the result. The game is left unchanged.
+        """
+        node = root
+        path = [root]
+
+        # Selection: follow the UCT rule down to a node with untried moves
+        while not node.untried and node.children:
+            node = self.select(node)
+            game.apply_index(node.move)
+            path.append(node)
+
+        # Expansion: add a child for a random untried move
+        untried = node.untried
+        if untried:
+            i = self._rng.randrange(len(untried))
+            untried[i], untried[-1] = untried[-1], untried[i]
+            move = untried.pop()
+            player = game.active_player
+            game.apply_index(move)
+            child = _TreeNode(move, player, game.legal_move_indices())
+            node.children.append(child)
+            path.append(child)
+
+        winner = self.rollout(game)
+        for _ in range(len(path) - 1):
+            game.undo_move()
+
+        # Backpropagation
+        for node in path:
+            node.visits += 1
+            if node.player == winner:
+                node.wins += 1
+
+    def select(self, node):
+        """Return the child of the node with the highest UCT value for the
+        player choosing the move.
+        """
+        log_visits = math.log(node.visits)
+        exploration = self.exploration
+        best_child, best_value = None, float("-inf")
+        for child in node.children:
+            value = (child.wins / child.visits +
+                     exploration * math.sqrt(log_visits / child.visits))
+            if value > best_value:
+                best_child, best_value = child, value
+        return best_child
+
+    def rollout(self, game):
+        """Play the game to the end with the rollout policy, leaving it
+        unchanged, and return the winner (see `Board.playout`).
+        """
+        return game.playout(self.rollout_policy, self._rng)
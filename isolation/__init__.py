@@ -9,3 +9,10 @@ legal moves loses, and the opponent is declared the winner.
 
 # Make the Board class available at the root of the module for imports
 from .isolation import Board
+from .bitboard import BitBoard
+
+# BoardBatch requires numpy, which the Board classes do not depend on
+try:
+    from .batch import BoardBatch
+except ImportError:
+    pass
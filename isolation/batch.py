@@ -0,0 +1,274 @@
+"""
+This file contains the `BoardBatch` class, which holds many independent games
+of Isolation as NumPy arrays so that legal moves, move application and
+terminal tests are computed for every game in a single call.
+
+The batch is intended for generating random or greedy playouts and datasets;
+use `from_boards()` and `to_board()` to move positions between a batch and
+the regular `Board` API.
+"""
+import numpy as np
+
+from .isolation import Board
+
+
+class BoardBatch(object):
+    """A collection of `size` games of Isolation on boards of the same size,
+    stepped together.
+
+    Cells are indexed as in `isolation.Board` (index = row + col * height),
+    and moves are passed and returned as cell indices; a move of -1 marks a
+    game that does not move (e.g., because it has already ended).
+
+    Parameters
+    ----------
+    size : int
+        The number of games in the batch.
+
+    width : int (optional)
+        The number of columns of every board.
+
+    height : int (optional)
+        The number of rows of every board.
+
+    Attributes
+    ----------
+    blocked : numpy.ndarray<bool>, shape (size, width * height + 1)
+        True for every occupied cell. The extra last column is always True;
+        it is the target of the padding entries of the knight-move table.
+
+    locations : numpy.ndarray<int>, shape (size, 2)
+        The cell index of player 1 and player 2 in each game, or -1 if the
+        player has not been placed on the board.
+
+    active : numpy.ndarray<int>, shape (size,)
+        The player holding the initiative in each game (0 for player 1 and 1
+        for player 2).
+
+    move_count : numpy.ndarray<int>, shape (size,)
+        The number of moves applied to each game.
+    """
+
+    def __init__(self, size, width=7, height=7):
+        self.size = size
+        self.width = width
+        self.height = height
+        cells = width * height
+
+        self.blocked = np.zeros((size, cells + 1), dtype=bool)
+        self.blocked[:, cells] = True
+        self.locations = np.full((size, 2), -1, dtype=np.int64)
+        self.active = np.zeros(size, dtype=np.int64)
+        self.move_count = np.zeros(size, dtype=np.int64)
+
+        # Knight moves from every cell, padded with the always-blocked
+        # sentinel cell so that every row has eight entries
+        self._neighbors = np.full((cells, 8), cells, dtype=np.int64)
+        for c in range(width):
+            for r in range(height):
+                idx = r + c * height
+                for j, (dr, dc) in enumerate([(-2, -1), (-2, 1), (-1, -2),
+                                              (-1, 2), (1, -2), (1, 2),
+                                              (2, -1), (2, 1)]):
+                    if 0 <= r + dr < height and 0 <= c + dc < width:
+                        self._neighbors[idx, j] = (r + dr) + (c + dc) * height
+        self._rows = np.arange(size)
+
+    @classmethod
+    def from_boards(cls, boards):
+        """Build a batch holding the current state of each board.
+
+        Parameters
+        ----------
+        boards : list<isolation.Board>
+            A non-empty list of boards that all have the same dimensions.
+
+        Returns
+        -------
+        BoardBatch
+        """
+        width, height = boards[0].width, boards[0].height
+        batch = cls(len(boards), width, height)
+        batch.blocked[:, :width * height] = True
+        for i, board in enumerate(boards):
+            if (board.width, board.height) != (width, height):
+                raise ValueError("All boards in a batch must have the same size.")
+            for r, c in board.iter_blank_spaces():
+                batch.blocked[i, r + c * height] = False
+            for j, player in enumerate((board._player_1, board._player_2)):
+                loc = board.get_player_location(player)
+                if loc is not Board.NOT_MOVED:
+                    batch.locations[i, j] = loc[0] + loc[1] * height
+            batch.active[i] = int(board.active_player == board._player_2)
+            batch.move_count[i] = board.move_count
+        return batch
+
+    def to_board(self, i, player_1, player_2, board_class=Board):
+        """Return a board holding the state of the i-th game of the batch.
+
+        Parameters
+        ----------
+        i : int
+            The index of the game in the batch.
+
+        player_1, player_2 : object
+            The players to register on the board.
+
+        board_class : class (optional)
+            `isolation.Board` or `isolation.BitBoard`.
+
+        Returns
+        -------
+        isolation.Board
+        """
+        board = board_class(player_1, player_2, self.width, self.height)
+        board._load_state(np.flatnonzero(self.blocked[i, :-1]).tolist(),
+                          int(self.locations[i, 0]), int(self.locations[i, 1]),
+                          bool(self.active[i]), int(self.move_count[i]))
+        return board
+
+    def copy(self):
+        """ Return a deep copy of the batch. """
+        new_batch = BoardBatch.__new__(BoardBatch)
+        new_batch.__dict__.update(self.__dict__)
+        new_batch.blocked = self.blocked.copy()
+        new_batch.locations = self.locations.copy()
+        new_batch.active = self.active.copy()
+        new_batch.move_count = self.move_count.copy()
+        return new_batch
+
+    def legal_move_mask(self):
+        """Return a boolean array of shape (size, width * height) that is True
+        for every legal move of the active player in each game.
+        """
+        open_cells = ~self.blocked
+        loc = self.locations[self._rows, self.active]
+        placed = loc >= 0
+
+        # Knight moves for the placed players; unplaced players may move to
+        # any open cell
+        mask = np.zeros_like(self.blocked)
+        targets = self._neighbors[np.where(placed, loc, 0)]
+        rows = self._rows[:, None]
+        mask[rows, targets] = open_cells[rows, targets]
+        mask[~placed] = open_cells[~placed]
+        return mask[:, :-1]
+
+    def mobility(self):
+        """Return an integer array of shape (size, 2) holding the number of
+        legal moves of player 1 and player 2 in each game.
+        """
+        open_cells = ~self.blocked
+        counts = np.empty((self.size, 2), dtype=np.int64)
+        for j in range(2):
+            loc = self.locations[:, j]
+            placed = loc >= 0
+            targets = self._neighbors[np.where(placed, loc, 0)]
+            counts[:, j] = open_cells[self._rows[:, None], targets].sum(axis=1)
+            counts[~placed, j] = open_cells[~placed].sum(axis=1)
+        return counts
+
+    def is_terminal(self):
+        """Return a boolean array that is True for every game in which the
+        active player has no legal moves (i.e., the game is over).
+        """
+        return ~self.legal_move_mask().any(axis=1)
+
+    def winners(self):
+        """Return an integer array holding the winner of each game (0 for
+        player 1 and 1 for player 2), or -1 for games still in progress.
+        """
+        return np.where(self.is_terminal(), 1 - self.active, -1)
+
+    def apply_moves(self, moves):
+        """Move the active player of every game to the cell given in `moves`,
+        in-place. Games with a move of -1 are left unchanged.
+
+        Parameters
+        ----------
+        moves : numpy.ndarray<int>, shape (size,)
+            The cell index of the next position of the active player in each
+            game, or -1.
+        """
+        moves = np.asarray(moves)
+        rows = self._rows[moves >= 0]
+        moves = moves[rows]
+        self.blocked[rows, moves] = True
+        self.locations[rows, self.active[rows]] = moves
+        self.active[rows] ^= 1
+        self.move_count[rows] += 1
+
+    def random_moves(self, rng=np.random):
+        """Return a uniformly random legal move for each game, or -1 for games
+        that are over.
+
+        Parameters
+        ----------
+        rng : numpy.random.Generator or module (optional)
+            The source of random numbers.
+        """
+        mask = self.legal_move_mask()
+        moves = np.argmax(rng.random(mask.shape) * mask, axis=1)
+        return np.where(mask.any(axis=1), moves, -1)
+
+    def greedy_moves(self, rng=np.random):
+        """Return, for each game, the legal move that leaves the active player
+        with the most legal moves on its next turn (the choice of a
+        `GreedyPlayer` using `open_move_score`), breaking ties randomly, or
+        -1 for games that are over.
+
+        Parameters
+        ----------
+        rng : numpy.random.Generator or module (optional)
+            The source of random numbers.
+        """
+        mask = self.legal_move_mask()
+        open_cells = ~self.blocked
+
+        # Moves open from every cell; a knight never returns to its own
+        # cell, so blocking the destination does not change the count
+        next_moves = open_cells[:, self._neighbors].sum(axis=2)
+
+        # Cells the opponent could move to; a move to one of them takes away
+        # a reply, and a move that takes away the last reply wins the game
+        opp_loc = self.locations[self._rows, 1 - self.active]
+        placed = opp_loc >= 0
+        reach = np.zeros_like(self.blocked)
+        reach[self._rows[:, None], self._neighbors[np.where(placed, opp_loc, 0)]] = True
+        reach[~placed] = True
+        reach &= open_cells
+        replies = reach.sum(axis=1)[:, None] - reach[:, :-1]
+        wins = replies == 0
+
+        scores = next_moves + 100 * wins + rng.random(mask.shape)
+        moves = np.argmax(np.where(mask, scores, -1.), axis=1)
+        return np.where(mask.any(axis=1), moves, -1)
+
+    def playout(self, policy="random", rng=np.random):
+        """Play every game in-place until it is over.
+
+        Parameters
+        ----------
+        policy : str (optional)
+            Either "random" or "greedy".
+
+        rng : numpy.random.Generator or module (optional)
+            The source of random numbers.
+
+        Returns
+        -------
+        numpy.ndarray<int>
+            The winner of each game (0 for player 1 and 1 for player 2).
+        """
+        if policy == "random":
+            choose = self.random_moves
+        elif policy == "greedy":
+            choose = self.greedy_moves
+        else:
+            raise ValueError("Unknown playout policy: {}".format(policy))
+
+        while True:
+            moves = choose(rng)
+            if (moves < 0).all():
+                return 1 - self.active
+            self.apply_moves(moves)
@@ -0,0 +1,470 @@
+"""
+This file contains the `BitBoard` class, an alternate backend for the game
+Isolation that stores the blocked cells of the board as a single integer
+bitmask instead of a list of cells.
+
+Legal moves are generated by masking a precomputed knight-move mask for the
+current square with the complement of the blocked cells, so move generation
+never builds candidate tuples or checks the bounds of the board. The public
+API is the same as `isolation.Board`, and the two classes can be used
+interchangeably by the players.
+"""
+import random
+
+from .isolation import Board, _zobrist_tables
+
+
+def _knight_masks(width, height):
+    """Return a list where the i-th entry is a bitmask of the cells reachable
+    by a knight from the cell with index i on a board of the given size.
+    """
+    directions = [(-2, -1), (-2, 1), (-1, -2), (-1, 2),
+                  (1, -2), (1, 2), (2, -1), (2, 1)]
+    masks = []
+    for c in range(width):
+        for r in range(height):
+            mask = 0
+            for dr, dc in directions:
+                if 0 <= r + dr < height and 0 <= c + dc < width:
+                    mask |= 1 << ((r + dr) + (c + dc) * height)
+            masks.append(mask)
+    return masks
+
+
+def _popcount(mask):
+    """Return the number of bits set in an integer bitmask. """
+    return bin(mask).count("1")
+
+
+def _flood(masks, frontier, open_mask):
+    """Return the bitmask of the cells of `open_mask` that a knight can reach
+    from the cells of `frontier` (which are included) by moving through the
+    cells of `open_mask`.
+    """
+    region = 0
+    frontier &= open_mask
+    while frontier:
+        region |= frontier
+        reached = 0
+        while frontier:
+            low = frontier & -frontier
+            reached |= masks[low.bit_length() - 1]
+            frontier ^= low
+        frontier = reached & open_mask & ~region
+    return region
+
+
+class BitBoard(Board):
+    """Implement a model for the game Isolation assuming each player moves like
+    a knight in chess, using an integer bitmask to represent blocked cells.
+
+    Parameters
+    ----------
+    player_1 : object
+        An object with a get_move() function. This is the only function
+        directly called by the Board class for each player.
+
+    player_2 : object
+        An object with a get_move() function. This is the only function
+        directly called by the Board class for each player.
+
+    width : int (optional)
+        The number of columns that the board should have.
+
+    height : int (optional)
+        The number of rows that the board should have.
+
+    shuffle : bool (optional)
+        If True (the default), the lists of legal moves are returned in random
+        order; otherwise they are returned in a fixed order.
+
+    seed : hashable (optional)
+        Seed for a random number generator owned by this board (and shared
+        with its copies) that is used to shuffle legal moves. If None, the
+        global `random` module is used.
+    """
+    __slots__ = ('_blocked', '_full_mask', '_masks')
+
+    # Knight-move masks are shared by every board with the same dimensions
+    _MASKS = {}
+
+    def __init__(self, player_1, player_2, width=7, height=7, shuffle=True,
+                 seed=None):
+        self.width = width
+        self.height = height
+        self.move_count = 0
+        self._player_1 = player_1
+        self._player_2 = player_2
+        self._active_player = player_1
+        self._inactive_player = player_2
+
+        # Bit i of the blocked mask is set once the cell with index
+        # i = row + col * height has been occupied by either player; player
+        # locations are stored as cell indices, or _NO_LOCATION
+        self._blocked = 0
+        self._player_1_loc = Board._NO_LOCATION
+        self._player_2_loc = Board._NO_LOCATION
+        self._full_mask = (1 << (width * height)) - 1
+        self._move_stack = []
+        self._zobrist = _zobrist_tables(width, height)
+        self._hash = 0
+
+        key = (width, height)
+        if key not in BitBoard._MASKS:
+            BitBoard._MASKS[key] = _knight_masks(width, height)
+        self._masks = BitBoard._MASKS[key]
+        self._shuffle = shuffle
+        self._rng = random if seed is None else random.Random(seed)
+        self._player_1_moves = None
+        self._player_2_moves = None
+
+    def _zobrist_hash(self):
+        """Compute the Zobrist hash of the current state from scratch. """
+        cell_keys, location_keys, side_key = self._zobrist
+        h = 0
+        for idx in range(self.width * self.height):
+            if self._blocked >> idx & 1:
+                h ^= cell_keys[idx]
+        for player_idx, loc in enumerate((self._player_1_loc,
+                                          self._player_2_loc)):
+            if loc >= 0:
+                h ^= location_keys[player_idx][loc]
+        if self._active_player == self._player_2:
+            h ^= side_key
+        return h
+
+    def copy(self):
+        """ Return a deep copy of the current board. """
+        new_board = BitBoard.__new__(BitBoard)
+        new_board.width = self.width
+        new_board.height = self.height
+        new_board.move_count = self.move_count
+        new_board._player_1 = self._player_1
+        new_board._player_2 = self._player_2
+        new_board._active_player = self._active_player
+        new_board._inactive_player = self._inactive_player
+        new_board._blocked = self._blocked
+        new_board._player_1_loc = self._player_1_loc
+        new_board._player_2_loc = self._player_2_loc
+        new_board._full_mask = self._full_mask
+        new_board._masks = self._masks
+        new_board._shuffle = self._shuffle
+        new_board._rng = self._rng
+        new_board._player_1_moves = self._player_1_moves
+        new_board._player_2_moves = self._player_2_moves
+        new_board._move_stack = []
+        new_board._zobrist = self._zobrist
+        new_board._hash = self._hash
+        return new_board
+
+    def move_is_legal(self, move):
+        """Test whether a move is legal in the current game state.
+
+        Parameters
+        ----------
+        move : (int, int)
+            A coordinate pair (row, column) indicating the next position for
+            the active player on the board.
+
+        Returns
+        -------
+        bool
+            Returns True if the move is legal, False otherwise
+        """
+        return (0 <= move[0] < self.height and 0 <= move[1] < self.width and
+                not self._blocked >> (move[0] + move[1] * self.height) & 1)
+
+    def get_blank_spaces(self):
+        """Return a list of the locations that are still available on the board.
+        """
+        return self._mask_to_moves(self._full_mask & ~self._blocked)
+
+    def count_blank_spaces(self):
+        """Return the number of locations that are still available on the
+        board (see `Board.count_blank_spaces`).
+        """
+        return _popcount(self._full_mask & ~self._blocked)
+
+    def iter_blank_spaces(self):
+        """Lazily generate the locations that are still available on the
+        board, in the same order as get_blank_spaces().
+        """
+        height = self.height
+        mask = self._full_mask & ~self._blocked
+        while mask:
+            low = mask & -mask
+            idx = low.bit_length() - 1
+            yield (idx % height, idx // height)
+            mask ^= low
+
+    def _move_mask(self, player):
+        """Return the bitmask of the open cells the player can move to. """
+        idx = self._loc_index(player)
+        if idx < 0:
+            return self._full_mask & ~self._blocked
+        return self._masks[idx] & ~self._blocked
+
+    def _mask_to_indices(self, mask):
+        """Convert a bitmask of cells to a list of cell indices. """
+        indices = []
+        while mask:
+            low = mask & -mask
+            indices.append(low.bit_length() - 1)
+            mask ^= low
+        return indices
+
+    def _blank_indices(self):
+        """Return the indices of the blank cells in increasing order. """
+        return self._mask_to_indices(self._full_mask & ~self._blocked)
+
+    def legal_move_indices(self, player=None):
+        """Return the legal moves for the specified player as cell indices
+        (see `Board.legal_move_indices`).
+        """
+        if player is None:
+            player = self._active_player
+        idx = self._loc_index(player)
+        if idx < 0:
+            return self._blank_indices()
+        moves = self._mask_to_indices(self._masks[idx] & ~self._blocked)
+        if self._shuffle:
+            self._rng.shuffle(moves)
+        return moves
+
+    def _mask_to_moves(self, mask):
+        """Convert a bitmask of cells to a list of (row, column) pairs. """
+        height = self.height
+        moves = []
+        while mask:
+            low = mask & -mask
+            idx = low.bit_length() - 1
+            moves.append((idx % height, idx // height))
+            mask ^= low
+        return moves
+
+    def _count_moves(self, idx):
+        """Count the moves available from the cell with index `idx`. """
+        if idx < 0:
+            return _popcount(self._full_mask & ~self._blocked)
+        return _popcount(self._masks[idx] & ~self._blocked)
+
+    def _regions(self):
+        """Return the open cells that each player can still reach as a pair
+        of bitmasks (see `Board._regions`), or None.
+        """
+        p1_idx, p2_idx = self._player_1_loc, self._player_2_loc
+        if p1_idx < 0 or p2_idx < 0:
+            return None
+        masks = self._masks
+        open_mask = self._full_mask & ~self._blocked
+        # Flood both regions one step at a time, so that players who are not
+        # separated are found out as soon as their regions meet
+        regions = [0, 0]
+        frontiers = [masks[p1_idx] & open_mask, masks[p2_idx] & open_mask]
+        while frontiers[0] or frontiers[1]:
+            for side in (0, 1):
+                frontier = frontiers[side]
+                if frontier & regions[1 - side]:
+                    return None
+                region = regions[side] = regions[side] | frontier
+                reached = 0
+                while frontier:
+                    low = frontier & -frontier
+                    reached |= masks[low.bit_length() - 1]
+                    frontier ^= low
+                frontiers[side] = reached & open_mask & ~region
+        return tuple(regions)
+
+    def forecast_mobility(self, player, counted_player):
+        """Return the number of legal moves of a player and the total number
+        of legal moves of `counted_player` after each of them (see
+        `Board.forecast_mobility`).
+        """
+        masks = self._masks
+        open_mask = self._full_mask & ~self._blocked
+        idx = self._loc_index(player)
+        moves_mask = open_mask if idx < 0 else masks[idx] & open_mask
+        num_moves = _popcount(moves_mask)
+
+        if counted_player == self._active_player:
+            total = 0
+            while moves_mask:
+                low = moves_mask & -moves_mask
+                total += _popcount(masks[low.bit_length() - 1] & open_mask)
+                moves_mask ^= low
+            return num_moves, total
+
+        counted_idx = self._loc_index(counted_player)
+        counted_mask = (open_mask if counted_idx < 0 else
+                        masks[counted_idx] & open_mask)
+        return num_moves, (num_moves * _popcount(counted_mask) -
+                           _popcount(moves_mask & counted_mask))
+
+    def playout(self, policy="random", rng=None):
+        """Play the game to the end with a simple policy and return the
+        winner, leaving the board unchanged (see `Board.playout`).
+        """
+        if policy not in ("random", "greedy"):
+            raise ValueError("Unknown playout policy: {}".format(policy))
+        greedy = policy == "greedy"
+        rng = rng or self._rng
+        masks = self._masks
+        blocked = self._blocked
+        locs = [self._player_1_loc, self._player_2_loc]
+        side = int(self._active_player == self._player_2)
+
+        while True:
+            loc = locs[side]
+            if loc < 0:
+                moves = self._full_mask & ~blocked
+            else:
+                moves = masks[loc] & ~blocked
+            if not moves:
+                break
+            moves = self._mask_to_indices(moves)
+
+            if greedy:
+                opp_loc = locs[1 - side]
+                replies = masks[opp_loc] & ~blocked if opp_loc >= 0 else None
+                best_value = -1.
+                for idx in moves:
+                    value = rng.random() + _popcount(masks[idx] & ~blocked)
+                    if replies is not None and not replies & ~(1 << idx):
+                        value += 100
+                    if value > best_value:
+                        move, best_value = idx, value
+            else:
+                move = rng.choice(moves)
+
+            blocked |= 1 << move
+            locs[side] = move
+            side = 1 - side
+
+        return self._player_1 if side else self._player_2
+
+    def _get_moves(self, idx):
+        """Generate the list of possible moves for an L-shaped motion (like a
+        knight in chess) from the cell with index `idx`.
+        """
+        if idx < 0:
+            return self._mask_to_moves(self._full_mask & ~self._blocked)
+        moves = self._mask_to_moves(self._masks[idx] & ~self._blocked)
+        if self._shuffle:
+            self._rng.shuffle(moves)
+        return moves
+
+    def apply_index(self, idx):
+        """Move the active player to the cell with index `idx`; equivalent to
+        `apply_move(index_to_move(idx))`.
+
+        Parameters
+        ----------
+        idx : int
+            The cell index (row + column * height) of the next position for
+            the active player on the board.
+        """
+        if self._active_player == self._player_1:
+            self._move_stack.append(self._player_1_loc)
+            self._hash ^= self._move_key(0, self._player_1_loc, idx)
+            self._player_1_loc = idx
+        else:
+            self._move_stack.append(self._player_2_loc)
+            self._hash ^= self._move_key(1, self._player_2_loc, idx)
+            self._player_2_loc = idx
+        self._blocked |= 1 << idx
+        self._player_1_moves = self._player_2_moves = None
+        self._active_player, self._inactive_player = self._inactive_player, self._active_player
+        self.move_count += 1
+
+    def undo_move(self):
+        """Take back the last move applied to the board, restoring the state
+        in-place.
+        """
+        prev_idx = self._move_stack.pop()
+        self._active_player, self._inactive_player = self._inactive_player, self._active_player
+        if self._active_player == self._player_1:
+            self._hash ^= self._move_key(0, prev_idx, self._player_1_loc)
+            self._blocked &= ~(1 << self._player_1_loc)
+            self._player_1_loc = prev_idx
+        else:
+            self._hash ^= self._move_key(1, prev_idx, self._player_2_loc)
+            self._blocked &= ~(1 << self._player_2_loc)
+            self._player_2_loc = prev_idx
+        self._player_1_moves = self._player_2_moves = None
+        self.move_count -= 1
+
+    def _load_state(self, blocked, player_1_loc, player_2_loc,
+                    player_2_active, move_count):
+        """Overwrite the state of a newly constructed board (see
+        `Board._load_state`).
+        """
+        for idx in blocked:
+            self._blocked |= 1 << idx
+        self._set_locations(player_1_loc, player_2_loc, player_2_active,
+                            move_count)
+
+    def is_winner(self, player):
+        """ Test whether the specified player has won the game. """
+        return player == self._inactive_player and not self._move_mask(self._active_player)
+
+    def is_loser(self, player):
+        """ Test whether the specified player has lost the game. """
+        return player == self._active_player and not self._move_mask(self._active_player)
+
+    def utility(self, player):
+        """Returns the utility of the current game state from the perspective
+        of the specified player.
+
+                    /  +infinity,   "player" wins
+        utility =  |   -infinity,   "player" loses
+                    \\          0,    otherwise
+
+        Parameters
+        ----------
+        player : object (optional)
+            An object registered as a player in the current game. If None,
+            return the utility for the active player on the board.
+
+        Returns
+        ----------
+        float
+            The utility value of the current game state for the specified
+            player. The game has a utility of +inf if the player has won,
+            a value of -inf if the player has lost, and a value of 0
+            otherwise.
+        """
+        if not self._move_mask(self._active_player):
+
+            if player == self._inactive_player:
+                return float("inf")
+
+            if player == self._active_player:
+                return float("-inf")
+
+        return 0.
+
+    def to_string(self, symbols=['1', '2']):
+        """Generate a string representation of the current game state, marking
+        the location of each player and indicating which cells have been
+        blocked, and which remain open.
+        """
+        col_margin = len(str(self.height - 1)) + 1
+        prefix = "{:<" + "{}".format(col_margin) + "}"
+        offset = " " * (col_margin + 3)
+        out = offset + '   '.join(map(str, range(self.width))) + '\n\r'
+        for i in range(self.height):
+            out += prefix.format(i) + ' | '
+            for j in range(self.width):
+                idx = i + j * self.height
+                if not self._blocked >> idx & 1:
+                    out += ' '
+                elif self._player_1_loc == idx:
+                    out += symbols[0]
+                elif self._player_2_loc == idx:
+                    out += symbols[1]
+                else:
+                    out += '-'
+                out += ' | '
+            out += '\n\r'
+
+        return out
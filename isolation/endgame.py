@@ -0,0 +1,188 @@
+"""
+This file contains an exact solver for the endgame of Isolation.
+
+Once the players are separated (see `Board.is_partitioned`), neither player
+can block the other any more, and each player simply makes as many moves as
+the longest knight path through its own region allows. The player to move
+loses unless its longest path is strictly longer than the opponent's, so the
+game is decided by two longest-path searches, which are memoized on the
+board size, the start cell and the open cells of the region.
+"""
+from .bitboard import BitBoard, _flood, _knight_masks, _popcount
+
+# Regions larger than this are not solved, since the search is exponential
+# in the size of the region; regions of up to 18 cells of a 7x7 board are
+# solved within a few milliseconds
+MAX_REGION_CELLS = 18
+
+# The players are not looked for separated regions while more cells than two
+# solvable regions can hold are blank, which skips the flood fill during the
+# opening and the middle game; blank cells that neither player can reach are
+# rare that early
+MAX_BLANK_CELLS = 2 * MAX_REGION_CELLS
+
+# Longest path lengths keyed by (start, region), one table per board size
+# since cell indices depend on the height; a table is cleared when it is full
+MAX_CACHE_ENTRIES = 1 << 18
+_CACHES = {}
+
+# Bitmasks of the cells with an even (row + column), by board size
+_EVEN_CELLS = {}
+
+
+def _tables(width, height):
+    """Return the knight-move masks, the mask of the even cells and the table
+    of longest path lengths of a board of the given size.
+    """
+    key = (width, height)
+    if key not in BitBoard._MASKS:
+        BitBoard._MASKS[key] = _knight_masks(width, height)
+    if key not in _EVEN_CELLS:
+        even = 0
+        for c in range(width):
+            for r in range(height):
+                if not (r + c) % 2:
+                    even |= 1 << (r + c * height)
+        _EVEN_CELLS[key] = even
+    if key not in _CACHES:
+        _CACHES[key] = {}
+    return BitBoard._MASKS[key], _EVEN_CELLS[key], _CACHES[key]
+
+
+def _path_bound(start, region, even):
+    """Return an upper bound on the length of a knight path from `start`
+    through the cells of `region`: a knight alternates between even and odd
+    cells, starting with the color opposite to its own.
+    """
+    if even >> start & 1:
+        first, second = _popcount(region & ~even), _popcount(region & even)
+    else:
+        first, second = _popcount(region & even), _popcount(region & ~even)
+    return min(first, second + 1) + min(first, second)
+
+
+def _longest_path(masks, even, cache, start, region):
+    """Return the number of moves of the longest knight path from the cell
+    `start` through the cells of `region`, every one of which must be
+    reachable from `start`.
+    """
+    key = (start, region)
+    length = cache.get(key)
+    if length is not None:
+        return length
+
+    bound = _path_bound(start, region, even)
+    length = 0
+    moves = masks[start] & region
+    while moves and length < bound:
+        low = moves & -moves
+        moves ^= low
+        idx = low.bit_length() - 1
+        # Cells that can no longer be reached from the new cell are dropped
+        # from the region, so equivalent positions share a cache entry
+        rest = _flood(masks, masks[idx], region ^ low)
+        length = max(length, 1 + _longest_path(masks, even, cache, idx, rest))
+
+    if len(cache) >= MAX_CACHE_ENTRIES:
+        cache.clear()
+    cache[key] = length
+    return length
+
+
+def _solvable_regions(game):
+    """Return the regions of the players (see `Board._regions`) if they are
+    separated and small enough to solve, or None.
+    """
+    if game.count_blank_spaces() > MAX_BLANK_CELLS:
+        return None
+    regions = game._regions()
+    if regions is None:
+        return None
+    if max(_popcount(region) for region in regions) > MAX_REGION_CELLS:
+        return None
+    return regions
+
+
+def longest_path(game, player):
+    """Return the number of moves the player can still make, playing alone
+    (i.e., ignoring the opponent) from its current location.
+
+    Parameters
+    ----------
+    game : `isolation.Board`
+        A game in which the player has been placed on the board.
+
+    player : object
+        A player registered on the board.
+
+    Returns
+    -------
+    int
+    """
+    masks, even, cache = _tables(game.width, game.height)
+    start = game._loc_index(player)
+    open_mask = 0
+    for idx in game._blank_indices():
+        open_mask |= 1 << idx
+    return _longest_path(masks, even, cache, start,
+                         _flood(masks, masks[start], open_mask))
+
+
+def endgame_score(game, player):
+    """Return the exact utility of a game in which the players are separated
+    from the point of view of the player, or None if the players are not
+    separated (or their regions are too large to solve).
+
+    Parameters
+    ----------
+    game : `isolation.Board`
+
+    player : object
+        A player registered on the board.
+
+    Returns
+    -------
+    float or None
+        +inf if the player wins with perfect play, -inf if it loses.
+    """
+    regions = _solvable_regions(game)
+    if regions is None:
+        return None
+
+    masks, even, cache = _tables(game.width, game.height)
+    lengths = [_longest_path(masks, even, cache, start, region)
+               for start, region in zip((game._player_1_loc,
+                                         game._player_2_loc), regions)]
+    if game.active_player == game._player_2:
+        lengths.reverse()
+    active_wins = lengths[0] > lengths[1]
+    if active_wins == (player == game.active_player):
+        return float("inf")
+    return float("-inf")
+
+
+def endgame_move(game):
+    """Return the first move of the longest path of the active player as a
+    cell index if the players are separated, or None otherwise (see
+    `endgame_score`). If the active player has no legal moves, return -1.
+    """
+    regions = _solvable_regions(game)
+    if regions is None:
+        return None
+
+    masks, even, cache = _tables(game.width, game.height)
+    if game.active_player == game._player_1:
+        start, region = game._player_1_loc, regions[0]
+    else:
+        start, region = game._player_2_loc, regions[1]
+    best_move, best_length = -1, -1
+    moves = masks[start] & region
+    while moves:
+        low = moves & -moves
+        moves ^= low
+        idx = low.bit_length() - 1
+        rest = _flood(masks, masks[idx], region ^ low)
+        length = _longest_path(masks, even, cache, idx, rest)
+        if length > best_length:
+            best_move, best_length = idx, length
+    return best_move
@@ -9,10 +9,83 @@ be available to project reviewers.
 """
 import random
 import timeit
-from copy import copy
 
 TIME_LIMIT_MILLIS = 150
 
+# Zobrist key tables shared by every board with the same dimensions
+_ZOBRIST_TABLES = {}
+
+
+def _zobrist_tables(width, height):
+    """Return the Zobrist keys for a board of the given size as a tuple
+    (cell_keys, location_keys, side_key).
+
+    cell_keys[i] marks cell i as blocked, location_keys[p][i] marks player p
+    (0 for player 1, 1 for player 2) standing on cell i, and side_key is
+    present while player 2 holds the initiative. The keys are generated from
+    a fixed seed so that hashes are reproducible between runs.
+    """
+    key = (width, height)
+    if key not in _ZOBRIST_TABLES:
+        rng = random.Random("zobrist-{}x{}".format(width, height))
+        size = width * height
+        cell_keys = [rng.getrandbits(64) for _ in range(size)]
+        location_keys = ([rng.getrandbits(64) for _ in range(size)],
+                         [rng.getrandbits(64) for _ in range(size)])
+        _ZOBRIST_TABLES[key] = (cell_keys, location_keys, rng.getrandbits(64))
+    return _ZOBRIST_TABLES[key]
+
+
+def _neighbor_table(width, height):
+    """Return a list where the i-th entry lists the knight moves from the
+    cell with index i = row + col * height as (index, (row, col)) pairs.
+    """
+    directions = [(-2, -1), (-2, 1), (-1, -2), (-1, 2),
+                  (1, -2), (1, 2), (2, -1), (2, 1)]
+    table = []
+    for c in range(width):
+        for r in range(height):
+            table.append([((r + dr) + (c + dc) * height, (r + dr, c + dc))
+                          for dr, dc in directions
+                          if 0 <= r + dr < height and 0 <= c + dc < width])
+    return table
+
+
+# Symmetry tables shared by every board with the same dimensions
+_SYMMETRY_TABLES = {}
+
+
+def _symmetry_table(width, height):
+    """Return the symmetries of a board of the given size as a list of cell
+    index permutations, where perm[i] is the image of the cell with index i.
+
+    Square boards have the 8 rotations and reflections of the square, and
+    rectangular boards have the identity, the two mirrors and the rotation by
+    180 degrees. The identity is always the first entry.
+    """
+    key = (width, height)
+    if key not in _SYMMETRY_TABLES:
+        h, w = height - 1, width - 1
+        transforms = [lambda r, c: (r, c),
+                      lambda r, c: (h - r, c),
+                      lambda r, c: (r, w - c),
+                      lambda r, c: (h - r, w - c)]
+        if width == height:
+            transforms += [lambda r, c: (c, r),
+                           lambda r, c: (c, h - r),
+                           lambda r, c: (w - c, r),
+                           lambda r, c: (w - c, h - r)]
+        table = []
+        for transform in transforms:
+            perm = []
+            for c in range(width):
+                for r in range(height):
+                    tr, tc = transform(r, c)
+                    perm.append(tr + tc * height)
+            table.append(perm)
+        _SYMMETRY_TABLES[key] = table
+    return _SYMMETRY_TABLES[key]
+
 
 class Board(object):
     """Implement a model for the game Isolation assuming each player moves like
@@ -33,11 +106,35 @@ class Board(object):
 
     height : int (optional)
         The number of rows that the board should have.
+
+    shuffle : bool (optional)
+        If True (the default), the lists of legal moves are returned in random
+        order; otherwise they are returned in a fixed order.
+
+    seed : hashable (optional)
+        Seed for a random number generator owned by this board (and shared
+        with its copies) that is used to shuffle legal moves. If None, the
+        global `random` module is used.
     """
+    __slots__ = ('width', 'height', 'move_count', '_player_1', '_player_2',
+                 '_active_player', '_inactive_player', '_board_state',
+                 '_player_1_loc', '_player_2_loc', '_move_stack', '_zobrist',
+                 '_hash', '_neighbors', '_shuffle', '_rng', '_player_1_moves',
+                 '_player_2_moves')
+
     BLANK = 0
     NOT_MOVED = None
 
-    def __init__(self, player_1, player_2, width=7, height=7):
+    # Cell index stored for a player that has not been placed on the board;
+    # get_player_location() reports it to callers as NOT_MOVED
+    _NO_LOCATION = -1
+
+    # Knight-move neighbor tables shared by every board with the same
+    # dimensions
+    _NEIGHBORS = {}
+
+    def __init__(self, player_1, player_2, width=7, height=7, shuffle=True,
+                 seed=None):
         self.width = width
         self.height = height
         self.move_count = 0
@@ -46,14 +143,88 @@ class Board(object):
         self._active_player = player_1
         self._inactive_player = player_2
 
-        # The last 3 entries of the board state includes initiative (0 for
-        # player 1, 1 for player 2) player 2 last move, and player 1 last move
-        self._board_state = [Board.BLANK] * (width * height + 3)
-        self._board_state[-1] = Board.NOT_MOVED
-        self._board_state[-2] = Board.NOT_MOVED
+        # One byte per cell (BLANK or 1 once occupied), indexed by
+        # row + col * height, and the cell index of each player
+        self._board_state = bytearray(width * height)
+        self._player_1_loc = Board._NO_LOCATION
+        self._player_2_loc = Board._NO_LOCATION
+
+        # Previous location of the player making each applied move, so that
+        # undo_move() can restore the state without copying the board
+        self._move_stack = []
+
+        # Zobrist hash of the state, updated incrementally by apply_move()
+        # and undo_move(); the empty board hashes to zero
+        self._zobrist = _zobrist_tables(width, height)
+        self._hash = 0
+
+        key = (width, height)
+        if key not in Board._NEIGHBORS:
+            Board._NEIGHBORS[key] = _neighbor_table(width, height)
+        self._neighbors = Board._NEIGHBORS[key]
+        self._shuffle = shuffle
+        self._rng = random if seed is None else random.Random(seed)
+
+        # Legal moves of each player in the current state, generated on
+        # demand and discarded by apply_move() and undo_move()
+        self._player_1_moves = None
+        self._player_2_moves = None
 
     def hash(self):
-        return str(self._board_state).__hash__()
+        return self._hash
+
+    @property
+    def zobrist_key(self):
+        """A 64-bit Zobrist hash of the current state covering the blocked
+        cells, both player locations and the player holding initiative.
+        """
+        return self._hash
+
+    def _zobrist_hash(self):
+        """Compute the Zobrist hash of the current state from scratch. """
+        cell_keys, location_keys, side_key = self._zobrist
+        h = 0
+        for idx in range(self.width * self.height):
+            if self._board_state[idx] != Board.BLANK:
+                h ^= cell_keys[idx]
+        for player_idx, loc in enumerate((self._player_1_loc,
+                                          self._player_2_loc)):
+            if loc >= 0:
+                h ^= location_keys[player_idx][loc]
+        if self._active_player == self._player_2:
+            h ^= side_key
+        return h
+
+    def canonical_key(self):
+        """Return a key that is the same for every state that is a mirror
+        image or rotation of the current one (see get_distinct_moves()).
+
+        Returns
+        -------
+        (int, list<int>)
+            The smallest Zobrist key of the images of the current state under
+            the symmetries of the board, and the symmetry that produces it as
+            a permutation of cell indices: perm[i] is the image of the cell
+            with index i.
+        """
+        cell_keys, location_keys, side_key = self._zobrist
+        blank = set(self._blank_indices())
+        blocked = [idx for idx in range(self.width * self.height)
+                   if idx not in blank]
+        locations = ((0, self._player_1_loc), (1, self._player_2_loc))
+        side = side_key if self._active_player == self._player_2 else 0
+
+        best_key = best_perm = None
+        for perm in _symmetry_table(self.width, self.height):
+            h = side
+            for idx in blocked:
+                h ^= cell_keys[perm[idx]]
+            for player_idx, loc in locations:
+                if loc >= 0:
+                    h ^= location_keys[player_idx][perm[loc]]
+            if best_key is None or h < best_key:
+                best_key, best_perm = h, perm
+        return best_key, best_perm
 
     @property
     def active_player(self):
@@ -92,13 +263,70 @@ class Board(object):
 
     def copy(self):
         """ Return a deep copy of the current board. """
-        new_board = Board(self._player_1, self._player_2, width=self.width, height=self.height)
+        # Fill in the slots directly rather than running __init__, which would
+        # build a fresh state only to replace it
+        new_board = Board.__new__(Board)
+        new_board.width = self.width
+        new_board.height = self.height
         new_board.move_count = self.move_count
+        new_board._player_1 = self._player_1
+        new_board._player_2 = self._player_2
         new_board._active_player = self._active_player
         new_board._inactive_player = self._inactive_player
-        new_board._board_state = copy(self._board_state)
+        new_board._board_state = self._board_state[:]
+        new_board._player_1_loc = self._player_1_loc
+        new_board._player_2_loc = self._player_2_loc
+        new_board._move_stack = []
+        new_board._zobrist = self._zobrist
+        new_board._hash = self._hash
+        new_board._neighbors = self._neighbors
+        new_board._shuffle = self._shuffle
+        new_board._rng = self._rng
+        new_board._player_1_moves = self._player_1_moves
+        new_board._player_2_moves = self._player_2_moves
         return new_board
 
+    def get_state(self):
+        """Return the state of the board as a tuple of plain values that can
+        be pickled (e.g., to send the position to another process) and
+        restored with `from_state()`. The players and the move history are
+        not included.
+
+        Returns
+        -------
+        tuple
+            (width, height, blocked, player_1_loc, player_2_loc,
+            player_2_active, move_count), where `blocked` is a tuple of the
+            indices of the occupied cells and each location is a cell index,
+            or -1 if the player has not been placed on the board.
+        """
+        blank = set(self._blank_indices())
+        blocked = tuple(idx for idx in range(self.width * self.height)
+                        if idx not in blank)
+        return (self.width, self.height, blocked, self._player_1_loc,
+                self._player_2_loc, self._active_player == self._player_2,
+                self.move_count)
+
+    @classmethod
+    def from_state(cls, player_1, player_2, state, shuffle=True, seed=None):
+        """Build a board holding a state returned by `get_state()`.
+
+        Parameters
+        ----------
+        player_1, player_2 : object
+            The players to register on the board.
+
+        state : tuple
+            A state returned by `get_state()`.
+
+        shuffle, seed : (optional)
+            See the constructor.
+        """
+        width, height = state[:2]
+        board = cls(player_1, player_2, width, height, shuffle, seed)
+        board._load_state(*state[2:])
+        return board
+
     def forecast_move(self, move):
         """Return a deep copy of the current game with an input move applied to
         advance the game one ply.
@@ -142,6 +370,130 @@ class Board(object):
         return [(i, j) for j in range(self.width) for i in range(self.height)
                 if self._board_state[i + j * self.height] == Board.BLANK]
 
+    def count_blank_spaces(self):
+        """Return the number of locations that are still available on the
+        board, without building the list of them.
+        """
+        return self._board_state.count(Board.BLANK)
+
+    def iter_blank_spaces(self):
+        """Lazily generate the locations that are still available on the
+        board, in the same order as get_blank_spaces().
+        """
+        height = self.height
+        board_state = self._board_state
+        for idx in range(self.width * height):
+            if board_state[idx] == Board.BLANK:
+                yield (idx % height, idx // height)
+
+    def get_distinct_moves(self, player=None):
+        """Return the legal moves for the specified player, keeping a single
+        representative of every group of moves that lead to symmetric states.
+
+        Symmetric moves only arise while the player has not been placed on
+        the board (the first two plies of a game), when any blank space is a
+        legal move: placements that are mirror images or rotations of each
+        other under a symmetry of the current state lead to equivalent games,
+        so a search only needs to expand one of them. Once the player has
+        been placed this is the same as get_legal_moves().
+
+        Parameters
+        ----------
+        player : object (optional)
+            An object registered as a player in the current game. If None,
+            return the moves for the active player on the board.
+
+        Returns
+        -------
+        list<(int, int)>
+            The list of coordinate pairs (row, column) of the distinct legal
+            moves for the player.
+        """
+        if player is None:
+            player = self._active_player
+        if self._loc_index(player) >= 0:
+            return self.get_legal_moves(player)
+        return [self.index_to_move(idx)
+                for idx in self.distinct_move_indices(player)]
+
+    def distinct_move_indices(self, player=None):
+        """Return the same moves as get_distinct_moves() as cell indices. """
+        if player is None:
+            player = self._active_player
+        if self._loc_index(player) >= 0:
+            return self.legal_move_indices(player)
+
+        blank = self._blank_indices()
+        blank_set = set(blank)
+        locations = (self._player_1_loc, self._player_2_loc)
+        # Symmetries that map the current state onto itself
+        stabilizer = [perm for perm in _symmetry_table(self.width, self.height)
+                      if all(loc < 0 or perm[loc] == loc for loc in locations)
+                      and all(perm[idx] in blank_set for idx in blank)]
+
+        moves = []
+        seen = set()
+        for idx in blank:
+            if idx in seen:
+                continue
+            seen.update(perm[idx] for perm in stabilizer)
+            moves.append(idx)
+        return moves
+
+    def _blank_indices(self):
+        """Return the indices of the blank cells in increasing order. """
+        board_state = self._board_state
+        return [idx for idx in range(self.width * self.height)
+                if board_state[idx] == Board.BLANK]
+
+    def index_to_move(self, idx):
+        """Convert a cell index to a (row, column) coordinate pair. """
+        return (idx % self.height, idx // self.height)
+
+    def move_to_index(self, move):
+        """Convert a (row, column) coordinate pair to a cell index. """
+        return move[0] + move[1] * self.height
+
+    def legal_move_indices(self, player=None):
+        """Return the legal moves for the specified player as cell indices
+        (row + column * height) instead of coordinate pairs. Searches can use
+        this together with apply_index() to avoid building tuples, and
+        convert the chosen move with index_to_move().
+
+        Parameters
+        ----------
+        player : object (optional)
+            An object registered as a player in the current game. If None,
+            return the legal moves for the active player on the board.
+
+        Returns
+        -------
+        list<int>
+            The cell indices of all legal moves for the player, in the same
+            order that get_legal_moves() would use.
+        """
+        if player is None:
+            player = self._active_player
+        idx = self._loc_index(player)
+        if idx < 0:
+            return self._blank_indices()
+
+        board_state = self._board_state
+        moves = [n for n, _ in self._neighbors[idx]
+                 if board_state[n] == Board.BLANK]
+        if self._shuffle:
+            self._rng.shuffle(moves)
+        return moves
+
+    def _loc_index(self, player):
+        """Return the cell index of the specified player, or _NO_LOCATION. """
+        if player == self._player_1:
+            return self._player_1_loc
+        elif player == self._player_2:
+            return self._player_2_loc
+        raise RuntimeError(
+            "Invalid player in get_player_location: {}".format(player))
+
     def get_player_location(self, player):
         """Find the current location of the specified player on the board.
 
@@ -156,17 +508,9 @@ class Board(object):
             The coordinate pair (row, column) of the input player, or None
             if the player has not moved.
         """
-        if player == self._player_1:
-            if self._board_state[-1] == Board.NOT_MOVED:
-                return Board.NOT_MOVED
-            idx = self._board_state[-1]
-        elif player == self._player_2:
-            if self._board_state[-2] == Board.NOT_MOVED:
-                return Board.NOT_MOVED
-            idx = self._board_state[-2]
-        else:
-            raise RuntimeError(
-                "Invalid player in get_player_location: {}".format(player))
+        idx = self._loc_index(player)
+        if idx < 0:
+            return Board.NOT_MOVED
         w = idx // self.height
         h = idx % self.height
         return (h, w)
@@ -188,7 +532,24 @@ class Board(object):
         """
         if player is None:
             player = self.active_player
-        return self.__get_moves(self.get_player_location(player))
+        return list(self._cached_moves(player))
+
+    def _cached_moves(self, player):
+        """Return the cached list of legal moves for the specified player,
+        generating it on the first request in the current state. The list is
+        shared with the cache (and with copies of the board), so it must not
+        be modified by the caller.
+        """
+        if player == self._player_1:
+            if self._player_1_moves is None:
+                self._player_1_moves = self._get_moves(self._player_1_loc)
+            return self._player_1_moves
+        elif player == self._player_2:
+            if self._player_2_moves is None:
+                self._player_2_moves = self._get_moves(self._player_2_loc)
+            return self._player_2_moves
+        raise RuntimeError(
+            "Invalid player in get_player_location: {}".format(player))
 
     def apply_move(self, move):
         """Move the active player to a specified location.
@@ -199,21 +560,114 @@ class Board(object):
             A coordinate pair (row, column) indicating the next position for
             the active player on the board.
         """
-        idx = move[0] + move[1] * self.height
-        last_move_idx = int(self.active_player == self._player_2) + 1
-        self._board_state[-last_move_idx] = idx
+        self.apply_index(move[0] + move[1] * self.height)
+
+    def apply_index(self, idx):
+        """Move the active player to the cell with index `idx`; equivalent to
+        `apply_move(index_to_move(idx))`.
+
+        Parameters
+        ----------
+        idx : int
+            The cell index (row + column * height) of the next position for
+            the active player on the board.
+        """
+        if self._active_player == self._player_2:
+            prev_idx = self._player_2_loc
+            self._player_2_loc = idx
+            self._hash ^= self._move_key(1, prev_idx, idx)
+        else:
+            prev_idx = self._player_1_loc
+            self._player_1_loc = idx
+            self._hash ^= self._move_key(0, prev_idx, idx)
+        self._move_stack.append(prev_idx)
         self._board_state[idx] = 1
-        self._board_state[-3] ^= 1
+        self._player_1_moves = self._player_2_moves = None
         self._active_player, self._inactive_player = self._inactive_player, self._active_player
         self.move_count += 1
 
+    def undo_move(self):
+        """Take back the last move applied to the board, restoring the state
+        in-place. Together with apply_move() this lets a search visit the
+        successors of a state without copying the board.
+
+        Only moves applied to this board object can be undone; a copy starts
+        with an empty move history. Raises an IndexError if there is no move
+        to take back.
+        """
+        prev_idx = self._move_stack.pop()
+        self._active_player, self._inactive_player = self._inactive_player, self._active_player
+        if self._active_player == self._player_2:
+            idx = self._player_2_loc
+            self._player_2_loc = prev_idx
+            self._hash ^= self._move_key(1, prev_idx, idx)
+        else:
+            idx = self._player_1_loc
+            self._player_1_loc = prev_idx
+            self._hash ^= self._move_key(0, prev_idx, idx)
+        self._board_state[idx] = Board.BLANK
+        self._player_1_moves = self._player_2_moves = None
+        self.move_count -= 1
+
+    def _load_state(self, blocked, player_1_loc, player_2_loc,
+                    player_2_active, move_count):
+        """Overwrite the state of a newly constructed board.
+
+        Parameters
+        ----------
+        blocked : iterable<int>
+            The indices of the occupied cells, including the cells of both
+            players.
+
+        player_1_loc, player_2_loc : int
+            The cell index of each player, or a negative value if the player
+            has not been placed on the board.
+
+        player_2_active : bool
+            True if player 2 holds the initiative.
+
+        move_count : int
+            The number of moves applied to reach the state.
+        """
+        for idx in blocked:
+            self._board_state[idx] = 1
+        self._set_locations(player_1_loc, player_2_loc, player_2_active,
+                            move_count)
+
+    def _set_locations(self, player_1_loc, player_2_loc, player_2_active,
+                       move_count):
+        """Set the player locations, initiative and move count, then reset
+        the move history, the move caches and the Zobrist hash.
+        """
+        self._player_1_loc = player_1_loc if player_1_loc >= 0 else Board._NO_LOCATION
+        self._player_2_loc = player_2_loc if player_2_loc >= 0 else Board._NO_LOCATION
+        if player_2_active:
+            self._active_player, self._inactive_player = self._player_2, self._player_1
+        else:
+            self._active_player, self._inactive_player = self._player_1, self._player_2
+        self.move_count = move_count
+        self._move_stack = []
+        self._player_1_moves = self._player_2_moves = None
+        self._hash = self._zobrist_hash()
+
+    def _move_key(self, player_idx, prev_idx, idx):
+        """Return the Zobrist delta for player `player_idx` (0 for player 1,
+        1 for player 2) moving from cell `prev_idx` (or _NO_LOCATION) to cell
+        `idx`. Applying the same delta again takes the move back.
+        """
+        cell_keys, location_keys, side_key = self._zobrist
+        delta = cell_keys[idx] ^ location_keys[player_idx][idx] ^ side_key
+        if prev_idx >= 0:
+            delta ^= location_keys[player_idx][prev_idx]
+        return delta
+
     def is_winner(self, player):
         """ Test whether the specified player has won the game. """
-        return player == self._inactive_player and not self.get_legal_moves(self._active_player)
+        return player == self._inactive_player and not self._cached_moves(self._active_player)
 
     def is_loser(self, player):
         """ Test whether the specified player has lost the game. """
-        return player == self._active_player and not self.get_legal_moves(self._active_player)
+        return player == self._active_player and not self._cached_moves(self._active_player)
 
     def utility(self, player):
         """Returns the utility of the current game state from the perspective
@@ -237,7 +691,7 @@ class Board(object):
             a value of -inf if the player has lost, and a value of 0
             otherwise.
         """
-        if not self.get_legal_moves(self._active_player):
+        if not self._cached_moves(self._active_player):
 
             if player == self._inactive_player:
                 return float("inf")
@@ -247,19 +701,248 @@ class Board(object):
 
         return 0.
 
-    def __get_moves(self, loc):
+    def count_legal_moves(self, player=None):
+        """Return the number of legal moves for the specified player without
+        building the list of moves.
+
+        Parameters
+        ----------
+        player : object (optional)
+            An object registered as a player in the current game. If None,
+            count the legal moves for the active player on the board.
+
+        Returns
+        -------
+        int
+            The number of legal moves available to the player.
+        """
+        if player is None:
+            player = self._active_player
+        return self._count_moves(self._loc_index(player))
+
+    def mobility(self, player):
+        """Return the utility of the current game state together with the
+        number of legal moves available to each player, computed in a single
+        pass without building any lists of moves.
+
+        This is equivalent to calling `utility(player)`,
+        `len(get_legal_moves(player))` and
+        `len(get_legal_moves(get_opponent(player)))`.
+
+        Parameters
+        ----------
+        player : object
+            An object registered as a player in the current game.
+
+        Returns
+        -------
+        (float, int, int)
+            The utility of the state for the player (+inf if the player has
+            won, -inf if the player has lost, 0 otherwise), the number of
+            legal moves of the player and the number of legal moves of the
+            opponent.
+        """
+        own_moves = self._count_moves(self._loc_index(player))
+        opp_moves = self._count_moves(
+            self._loc_index(self.get_opponent(player)))
+
+        if player == self._active_player:
+            if not own_moves:
+                return float("-inf"), own_moves, opp_moves
+        elif not opp_moves:
+            return float("inf"), own_moves, opp_moves
+        return 0., own_moves, opp_moves
+
+    def forecast_mobility(self, player, counted_player):
+        """Return the number of legal moves of a player together with the
+        total number of legal moves of `counted_player` over the states that
+        forecast_move() would return for each of those moves, computed from
+        the neighbor tables without copying the board.
+
+        This is equivalent to
+        `moves = get_legal_moves(player)` and
+        `sum(len(forecast_move(m).get_legal_moves(counted_player))
+        for m in moves)`. Note that forecast_move() always moves the active
+        player, even to the cells of the legal moves of the inactive player.
+
+        Parameters
+        ----------
+        player : object
+            The player whose legal moves are forecast.
+
+        counted_player : object
+            The player whose legal moves are counted in every forecast state.
+
+        Returns
+        -------
+        (int, int)
+            The number of legal moves of the player, and the total number of
+            legal moves of the counted player after each of them.
+        """
+        board_state = self._board_state
+        neighbors = self._neighbors
+        idx = self._loc_index(player)
+        if idx < 0:
+            moves = self._blank_indices()
+        else:
+            moves = [n for n, _ in neighbors[idx]
+                     if board_state[n] == Board.BLANK]
+
+        total = 0
+        if counted_player == self._active_player:
+            # The counted player moves to each cell and moves on from there
+            for move in moves:
+                for n, _ in neighbors[move]:
+                    if board_state[n] == Board.BLANK:
+                        total += 1
+            return len(moves), total
+
+        # Each move blocks one cell, taking it from the counted player's
+        # moves if it is one of them
+        counted_idx = self._loc_index(counted_player)
+        total = len(moves) * self._count_moves(counted_idx)
+        if counted_idx < 0:
+            return len(moves), total - len(moves)
+        for n, _ in neighbors[counted_idx]:
+            if n in moves:
+                total -= 1
+        return len(moves), total
+
+    def playout(self, policy="random", rng=None):
+        """Play the game from the current state to the end, choosing the moves
+        of both players with a simple policy, and return the winner. The board
+        is left unchanged: the moves are taken back at the end, and neither
+        the Zobrist hash, the move history nor the move caches are updated.
+
+        Parameters
+        ----------
+        policy : str (optional)
+            Either "random" (uniformly random moves) or "greedy" (the move
+            that leaves the player with the most legal moves, or that takes
+            away the last move of the opponent, with ties broken randomly).
+
+        rng : random.Random or module (optional)
+            The source of random numbers. If None, the random number generator
+            of the board is used.
+
+        Returns
+        -------
+        object
+            The player that wins the playout.
+        """
+        if policy not in ("random", "greedy"):
+            raise ValueError("Unknown playout policy: {}".format(policy))
+        greedy = policy == "greedy"
+        rng = rng or self._rng
+        board_state = self._board_state
+        neighbors = self._neighbors
+        locs = [self._player_1_loc, self._player_2_loc]
+        side = int(self._active_player == self._player_2)
+
+        played = []
+        while True:
+            loc = locs[side]
+            if loc < 0:
+                moves = [idx for idx in range(len(board_state))
+                         if board_state[idx] == Board.BLANK]
+            else:
+                moves = [n for n, _ in neighbors[loc]
+                         if board_state[n] == Board.BLANK]
+            if not moves:
+                break
+
+            if greedy:
+                opp_loc = locs[1 - side]
+                replies = ([n for n, _ in neighbors[opp_loc]
+                            if board_state[n] == Board.BLANK]
+                           if opp_loc >= 0 else None)
+                best_value = -1.
+                for idx in moves:
+                    value = rng.random()
+                    for n, _ in neighbors[idx]:
+                        if board_state[n] == Board.BLANK:
+                            value += 1
+                    if replies is not None and not [n for n in replies
+                                                    if n != idx]:
+                        value += 100
+                    if value > best_value:
+                        move, best_value = idx, value
+            else:
+                move = rng.choice(moves)
+
+            board_state[move] = 1
+            played.append(move)
+            locs[side] = move
+            side = 1 - side
+
+        for idx in played:
+            board_state[idx] = Board.BLANK
+        return self._player_1 if side else self._player_2
+
+    def is_partitioned(self):
+        """Test whether the players are separated, i.e., no open cell can be
+        reached by both players any more, so that each player can only move
+        inside its own region of the board for the rest of the game.
+
+        Returns
+        -------
+        bool
+            True if both players are on the board and are separated
+        """
+        return self._regions() is not None
+
+    def _regions(self):
+        """Return the open cells that each player can still reach as a pair
+        of bitmasks of cell indices (player 1, player 2) if the players are
+        separated, or None otherwise.
+        """
+        p1_idx, p2_idx = self._player_1_loc, self._player_2_loc
+        if p1_idx < 0 or p2_idx < 0:
+            return None
+
+        board_state = self._board_state
+        neighbors = self._neighbors
+        # Knight moves are reversible, so the players share a cell they can
+        # reach if and only if player 1 can reach a move of player 2
+        p2_moves = {n for n, _ in neighbors[p2_idx] if board_state[n] == Board.BLANK}
+        regions = []
+        for start, targets in ((p1_idx, p2_moves), (p2_idx, ())):
+            region = 0
+            stack = [start]
+            while stack:
+                for n, _ in neighbors[stack.pop()]:
+                    if board_state[n] == Board.BLANK and not region >> n & 1:
+                        if n in targets:
+                            return None
+                        region |= 1 << n
+                        stack.append(n)
+            regions.append(region)
+        return tuple(regions)
+
+    def _count_moves(self, idx):
+        """Count the moves available from the cell with index `idx`. """
+        board_state = self._board_state
+        if idx < 0:
+            return board_state.count(Board.BLANK)
+
+        count = 0
+        for n, _ in self._neighbors[idx]:
+            if board_state[n] == Board.BLANK:
+                count += 1
+        return count
+
+    def _get_moves(self, idx):
         """Generate the list of possible moves for an L-shaped motion (like a
-        knight in chess).
+        knight in chess) from the cell with index `idx`.
         """
-        if loc == Board.NOT_MOVED:
+        if idx < 0:
             return self.get_blank_spaces()
 
-        r, c = loc
-        directions = [(-2, -1), (-2, 1), (-1, -2), (-1, 2),
-                      (1, -2), (1, 2), (2, -1), (2, 1)]
-        valid_moves = [(r + dr, c + dc) for dr, dc in directions
-                       if self.move_is_legal((r + dr, c + dc))]
-        random.shuffle(valid_moves)
+        board_state = self._board_state
+        valid_moves = [move for n, move in self._neighbors[idx]
+                       if board_state[n] == Board.BLANK]
+        if self._shuffle:
+            self._rng.shuffle(valid_moves)
         return valid_moves
 
     def print_board(self):
@@ -271,8 +954,8 @@ class Board(object):
         the location of each player and indicating which cells have been
         blocked, and which remain open.
         """
-        p1_loc = self._board_state[-1]
-        p2_loc = self._board_state[-2]
+        p1_loc = self._player_1_loc
+        p2_loc = self._player_2_loc
 
         col_margin = len(str(self.height - 1)) + 1
         prefix = "{:<" + "{}".format(col_margin) + "}"
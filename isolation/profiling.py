@@ -0,0 +1,224 @@
+"""
+This file contains opt-in profiling hooks that attribute the time spent in a
+game to the subsystems of the players: move generation, board copies,
+applying and taking back moves, and the evaluation (score) functions.
+
+While a `Profiler` is enabled, the timed methods of `Board` and `BitBoard`
+and the `score` and `get_move` attributes of the profiled players are
+replaced by timing wrappers; disabling it restores the original functions,
+so the hooks cost nothing when they are not in use. Times are exclusive: the
+time spent in a timed call made from another timed call (e.g., the copy made
+by forecast_move, or the moves generated by a score function) is charged to
+the inner call only, and the time of get_move() that is not spent in any
+timed call is charged to the search itself.
+
+The hooks are not thread-safe; disable pondering while profiling.
+"""
+import timeit
+
+from collections import defaultdict
+
+from .isolation import Board, TIME_LIMIT_MILLIS
+from .bitboard import BitBoard
+
+# Timed methods of the board classes, by subsystem
+BOARD_HOOKS = {
+    "move generation": ("get_legal_moves", "legal_move_indices",
+                        "distinct_move_indices", "get_distinct_moves",
+                        "count_legal_moves", "mobility",
+                        "forecast_mobility", "is_winner", "is_loser",
+                        "utility"),
+    "copy": ("copy", "forecast_move"),
+    "apply/undo": ("apply_move", "apply_index", "undo_move"),
+}
+
+# Subsystems of the time spent in the players' functions
+EVALUATION = "evaluation"
+SEARCH = "search"
+
+# Key of the time spent by Board.play between the players' turns
+GAME = "game"
+
+# The profiler whose hooks are installed, if any
+_active = None
+
+
+class Profiler(object):
+    """Collect the number of calls and the exclusive time of the board
+    primitives and of the score functions, by player.
+
+    Parameters
+    ----------
+    clock : callable (optional)
+        A function returning the current time in seconds.
+    """
+
+    def __init__(self, clock=timeit.default_timer):
+        self._clock = clock
+        self._originals = []
+        self.reset()
+
+    def reset(self):
+        """Forget the calls and times collected so far. """
+        # (calls, seconds) by player name, then by subsystem
+        self.calls = defaultdict(lambda: defaultdict(int))
+        self.times = defaultdict(lambda: defaultdict(float))
+        self.moves = defaultdict(int)
+        self._stack = []
+        self._mark = 0.
+        self._player = GAME
+
+    @property
+    def enabled(self):
+        """True while the hooks of this profiler are installed. """
+        return _active is self
+
+    def enable(self, players=(), names=None):
+        """Install the hooks, timing the board primitives and the get_move()
+        and score functions of the given players.
+
+        Parameters
+        ----------
+        players : iterable<object> (optional)
+            The players whose moves and score functions are timed.
+
+        names : iterable<str> (optional)
+            The names of the players in the report; the class names of the
+            players by default.
+        """
+        global _active
+        if _active is not None:
+            raise RuntimeError("Another profiler is already enabled.")
+        _active = self
+
+        for cls in (Board, BitBoard):
+            for subsystem, methods in BOARD_HOOKS.items():
+                for name in methods:
+                    if name in vars(cls):
+                        self._patch(cls, name, subsystem, vars(cls)[name])
+
+        players = list(players)
+        if names is None:
+            names = ["{} {}".format(type(player).__name__, i + 1)
+                     for i, player in enumerate(players)]
+        for player, name in zip(players, names):
+            if getattr(player, "score", None) is not None:
+                self._patch(player, "score", EVALUATION, player.score)
+            self._patch(player, "get_move", SEARCH, player.get_move,
+                        player_name=name)
+
+    def disable(self):
+        """Remove the hooks, restoring the original functions. """
+        global _active
+        for owner, name, original in reversed(self._originals):
+            if isinstance(owner, type):
+                setattr(owner, name, original)
+            elif original is None:
+                delattr(owner, name)
+            else:
+                setattr(owner, name, original)
+        self._originals = []
+        if _active is self:
+            _active = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.disable()
+
+    def _patch(self, owner, name, subsystem, func, player_name=None):
+        """Replace the function `name` of the owner (a class or a player)
+        with a timing wrapper charging its exclusive time to the subsystem.
+        """
+        if isinstance(owner, type):
+            original = func
+        else:
+            # Instance attributes are restored; methods looked up on the
+            # class are removed from the instance again
+            original = vars(owner).get(name)
+        self._originals.append((owner, name, original))
+        setattr(owner, name, self._timed(subsystem, name, func, player_name))
+
+    def _timed(self, subsystem, name, func, player_name):
+        """Return a wrapper of func that charges its exclusive time to the
+        subsystem; a player's get_move() also sets the player that the time
+        of the calls it makes is charged to.
+        """
+        clock = self._clock
+
+        def timed(*args, **kwargs):
+            now = clock()
+            stack = self._stack
+            if stack:
+                self.times[self._player][stack[-1]] += now - self._mark
+            outer_player = self._player
+            if player_name is not None:
+                self._player = player_name
+                self.moves[player_name] += 1
+            player = self._player
+            self.calls[player][subsystem] += 1
+            stack.append(subsystem)
+            self._mark = now
+            try:
+                return func(*args, **kwargs)
+            finally:
+                now = clock()
+                self.times[player][stack.pop()] += now - self._mark
+                self._mark = now
+                self._player = outer_player
+
+        timed.__name__ = name
+        timed.__doc__ = func.__doc__
+        return timed
+
+    def report(self):
+        """Return the time and number of calls of every subsystem by player
+        as a multi-line string.
+        """
+        lines = []
+        for player in sorted(self.times, key=lambda p: (p == GAME, p)):
+            times = self.times[player]
+            total = sum(times.values())
+            if player == GAME:
+                lines.append("Board.play, between turns: {:.1f} ms".format(
+                    1000 * total))
+            else:
+                lines.append("{}: {} moves, {:.1f} ms".format(
+                    player, self.moves[player], 1000 * total))
+            for subsystem in sorted(times, key=times.get, reverse=True):
+                lines.append("  {:<16}{:>10.1f} ms{:>7.1f}%{:>10} calls".format(
+                    subsystem, 1000 * times[subsystem],
+                    100 * times[subsystem] / total if total else 0.,
+                    self.calls[player][subsystem]))
+        return "\n".join(lines)
+
+
+def profile_game(game, time_limit=TIME_LIMIT_MILLIS, names=None):
+    """Play the game with a new profiler enabled for both players, as
+    Board.play would.
+
+    Parameters
+    ----------
+    game : `isolation.Board`
+        A game whose players have not been profiled.
+
+    time_limit : numeric (optional)
+        The time limit of every turn in milliseconds.
+
+    names : (str, str) (optional)
+        The names of the players in the report.
+
+    Returns
+    -------
+    (player, list<[(int, int),]>, str, Profiler)
+        The result of Board.play and the profiler holding the times of the
+        game (see `Profiler.report`).
+    """
+    profiler = Profiler()
+    profiler.enable((game._player_1, game._player_2), names)
+    try:
+        winner, history, outcome = game.play(time_limit)
+    finally:
+        profiler.disable()
+    return winner, history, outcome, profiler
@@ -0,0 +1,204 @@
+"""Build and read the opening book of `AlphaBetaPlayer`.
+
+The book maps every state of the first few plies of a game on the default
+7x7 board to the move chosen by a deep alpha-beta search. States that are
+mirror images or rotations of each other share a single entry, keyed by
+`Board.canonical_key()`, and the move is stored in the canonical frame.
+
+The book is stored in a compact binary file: a header, which also names the
+score function of the search that built the book, followed by one
+fixed-size record (key, move) per state, sorted by key. Lookups memory-map
+the file and binary search the records, so the book costs nothing to load
+and a hit takes microseconds.
+
+Run this script to rebuild the book (this takes a while):
+
+    python opening_book.py --plies 5 --depth 8
+"""
+import argparse
+import mmap
+import os
+import struct
+
+from isolation import Board
+
+BOOK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                         "opening_book.bin")
+
+# magic, version, width, height, plies, number of records, heuristic
+HEADER = struct.Struct("<4sBBBBI64s")
+# canonical key, move (cell index in the canonical frame)
+RECORD = struct.Struct("<QB")
+MAGIC = b"ISOB"
+VERSION = 2
+
+BOOK_PLIES = 5  # the book covers the states with move_count < BOOK_PLIES
+BOOK_DEPTH = 8  # search depth used to choose the move of every state
+
+
+class OpeningBook:
+    """Read-only opening book backed by a memory-mapped file.
+
+    Parameters
+    ----------
+    path : str (optional)
+        The path of a book file written by `write_book()`.
+    """
+
+    def __init__(self, path=BOOK_PATH):
+        with open(path, "rb") as book_file:
+            self._data = mmap.mmap(book_file.fileno(), 0,
+                                   access=mmap.ACCESS_READ)
+        if len(self._data) < HEADER.size:
+            raise ValueError("{} is not an opening book file".format(path))
+        (magic, version, self.width, self.height, self.plies, self.size,
+         heuristic) = HEADER.unpack_from(self._data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("{} is not an opening book file".format(path))
+        # The name of the score function that built the book
+        self.heuristic = heuristic.rstrip(b"\0").decode("utf-8")
+        if len(self._data) != HEADER.size + self.size * RECORD.size:
+            raise ValueError("{} is truncated".format(path))
+
+    def __len__(self):
+        return self.size
+
+    def lookup(self, game):
+        """Return the book move of the active player of the game as a pair
+        (row, column), or None if the state is not in the book.
+        """
+        if (game.move_count >= self.plies or game.width != self.width or
+                game.height != self.height):
+            return None
+
+        key, perm = game.canonical_key()
+        data = self._data
+        lo, hi = 0, self.size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            mid_key, move = RECORD.unpack_from(data,
+                                               HEADER.size + mid * RECORD.size)
+            if mid_key < key:
+                lo = mid + 1
+            elif mid_key > key:
+                hi = mid
+            else:
+                # Map the move back from the canonical frame
+                return game.index_to_move(perm.index(move))
+        return None
+
+    def close(self):
+        """Unmap the book file. """
+        self._data.close()
+
+
+def heuristic_name(score_fn):
+    """Return the name of a score function recorded in the header of a book,
+    as "module.function". Wrappers of a score function that keep it in a
+    `score_fn` attribute (e.g., `game_agent.EvalCache`) are named after it.
+    """
+    score_fn = getattr(score_fn, "score_fn", score_fn)
+    return "{}.{}".format(getattr(score_fn, "__module__", None),
+                          getattr(score_fn, "__qualname__",
+                                  type(score_fn).__qualname__))
+
+
+# Books loaded by load_book(), by path
+_BOOKS = {}
+
+
+def load_book(path=BOOK_PATH):
+    """Return the OpeningBook stored at the path, shared by every caller in
+    the process, or None if there is no book file.
+    """
+    if path not in _BOOKS:
+        _BOOKS[path] = OpeningBook(path) if os.path.exists(path) else None
+    return _BOOKS[path]
+
+
+def book_states(plies, width=7, height=7):
+    """Return a dict mapping the canonical key of every state reachable in
+    fewer than `plies` moves to a board holding one such state.
+    """
+    board = Board("1", "2", width, height, shuffle=False)
+    level = {board.canonical_key()[0]: board}
+    states = dict(level)
+    for _ in range(plies - 1):
+        next_level = {}
+        for board in level.values():
+            for move in board.distinct_move_indices():
+                child = board.copy()
+                child.apply_index(move)
+                key = child.canonical_key()[0]
+                if key not in next_level:
+                    next_level[key] = child
+        states.update(next_level)
+        level = next_level
+    return states
+
+
+def build_book(plies=BOOK_PLIES, depth=BOOK_DEPTH, width=7, height=7,
+               score_fn=None, verbose=False):
+    """Search every state of the first `plies` plies to the given depth with
+    the score function (game_agent.custom_score by default) and return a list
+    of (canonical key, canonical move) records.
+    """
+    # game_agent loads the book, so it is only imported to build one
+    from game_agent import AlphaBetaPlayer, custom_score
+
+    player = AlphaBetaPlayer(score_fn=score_fn or custom_score, book=False)
+    player.time_left = lambda: float("inf")
+    records = []
+    states = book_states(plies, width, height)
+    for count, (_, board) in enumerate(sorted(states.items())):
+        # Search with the player holding the initiative
+        state = board.get_state()
+        if state[5]:
+            game = Board.from_state("1", player, state, shuffle=False)
+        else:
+            game = Board.from_state(player, "2", state, shuffle=False)
+        if not game.get_legal_moves():
+            continue
+        player.tt.new_search()
+        for d in range(1, depth + 1):
+            move = player.alphabeta(game, d)
+        if move == (-1, -1):
+            move = game.get_legal_moves()[0]
+        canonical_key, perm = game.canonical_key()
+        records.append((canonical_key, perm[game.move_to_index(move)]))
+        if verbose and (count + 1) % 500 == 0:
+            print("{} / {} states".format(count + 1, len(states)), flush=True)
+    return records
+
+
+def write_book(records, plies, heuristic, path=BOOK_PATH, width=7,
+               height=7):
+    """Write the (key, move) records of a book built with the named score
+    function (see `heuristic_name()`) to a file.
+    """
+    records = sorted(records)
+    with open(path, "wb") as book_file:
+        book_file.write(HEADER.pack(MAGIC, VERSION, width, height, plies,
+                                    len(records), heuristic.encode("utf-8")))
+        for key, move in records:
+            book_file.write(RECORD.pack(key, move))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Build the opening book of AlphaBetaPlayer.")
+    parser.add_argument("--plies", type=int, default=BOOK_PLIES)
+    parser.add_argument("--depth", type=int, default=BOOK_DEPTH)
+    parser.add_argument("--output", default=BOOK_PATH)
+    args = parser.parse_args()
+
+    from game_agent import custom_score
+
+    records = build_book(args.plies, args.depth, score_fn=custom_score,
+                         verbose=True)
+    write_book(records, args.plies, heuristic_name(custom_score), args.output)
+    print("Wrote {} states to {}".format(len(records), args.output))
+
+
+if __name__ == "__main__":
+    main()
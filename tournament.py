@@ -20,8 +20,8 @@ from collections import namedtuple
 from isolation import Board
 from sample_players import (RandomPlayer, open_move_score,
                             improved_score, center_score)
-from game_agent import (MinimaxPlayer, AlphaBetaPlayer, custom_score,
-                        custom_score_2, custom_score_3)
+from game_agent import (MinimaxPlayer, AlphaBetaPlayer, MCTSPlayer,
+                        custom_score, custom_score_2, custom_score_3)
 
 NUM_MATCHES = 5  # number of matches against each opponent
 TIME_LIMIT = 150  # number of milliseconds before timeout
@@ -31,12 +31,55 @@ This script evaluates the performance of the custom_score evaluation
 function against a baseline agent using alpha-beta search and iterative
 deepening (ID) called `AB_Improved`. The three `AB_Custom` agents use
 ID and alpha-beta search with the custom_score functions defined in
-game_agent.py.
+game_agent.py. The `MCTS` agent uses Monte Carlo tree search with random
+rollouts under the same time limit.
 """
 
 Agent = namedtuple("Agent", ["player", "name"])
 
 
+class SearchSummary:
+    """Search statistics (see `game_agent.SearchStats`) of an agent summed
+    over every move it made during the tournament.
+    """
+
+    def __init__(self):
+        self.moves = 0
+        self.nodes = 0
+        self.leaves = 0
+        self.depth = 0
+        self.elapsed = 0.
+        self.time_left = 0.
+        self.min_time_left = float("inf")
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+
+    def add(self, stats):
+        """Add the statistics of one move. """
+        self.moves += 1
+        self.nodes += stats.nodes
+        self.leaves += stats.leaves
+        self.depth += stats.depth
+        self.elapsed += stats.elapsed
+        self.time_left += stats.time_left
+        self.min_time_left = min(self.min_time_left, stats.time_left)
+        self.cutoffs += sum(stats.cutoffs.values())
+        self.first_move_cutoffs += stats.cutoffs.get(0, 0)
+
+    def record(self, player):
+        """Wrap the get_move() method of the player so that the statistics
+        of every move it makes are added to the summary.
+        """
+        get_move = player.get_move
+
+        def recorded_get_move(game, time_left):
+            move = get_move(game, time_left)
+            self.add(player.stats)
+            return move
+
+        player.get_move = recorded_get_move
+
+
 def play_round(cpu_agent, test_agents, win_counts, num_matches):
     """Compare the test agents to the cpu agent in "fair" matches.
 
@@ -71,6 +114,25 @@ def play_round(cpu_agent, test_agents, win_counts, num_matches):
     return timeout_count, forfeit_count
 
 
+def print_search_stats(test_agents, summaries):
+    """Print the search statistics of every test agent per move. """
+    print("\n{:^74}".format("Search statistics per move"))
+    print("{:^16}{:>10}{:>12}{:>10}{:>12}{:>14}".format(
+        "Agent", "Depth", "Nodes", "kNPS", "Time left", "1st cutoffs"))
+    for agent in test_agents:
+        summary = summaries[agent.player]
+        if not summary.moves:
+            continue
+        moves = summary.moves
+        nps = (summary.nodes / summary.elapsed) if summary.elapsed > 0 else 0.
+        first = ("{:.1f}%".format(100. * summary.first_move_cutoffs /
+                                  summary.cutoffs)
+                 if summary.cutoffs else "-")
+        print("{:^16}{:>10.1f}{:>12.0f}{:>10.1f}{:>9.1f} ms{:>14}".format(
+            agent.name, summary.depth / moves, summary.nodes / moves, nps,
+            summary.time_left / moves, first))
+
+
 def update(total_wins, wins):
     for player in total_wins:
         total_wins[player] += wins[player]
@@ -80,6 +142,9 @@ def update(total_wins, wins):
 def play_matches(cpu_agents, test_agents, num_matches):
     """Play matches between the test agent and each cpu_agent individually. """
     total_wins = {agent.player: 0 for agent in test_agents}
+    summaries = {agent.player: SearchSummary() for agent in test_agents}
+    for agent in test_agents:
+        summaries[agent.player].record(agent.player)
     total_timeouts = 0.
     total_forfeits = 0.
     total_matches = 2 * num_matches * len(cpu_agents)
@@ -114,6 +179,8 @@ def play_matches(cpu_agents, test_agents, num_matches):
             ) for x in enumerate(test_agents)
     ]))
 
+    print_search_stats(test_agents, summaries)
+
     if total_timeouts:
         print(("\nThere were {} timeouts during the tournament -- make sure " +
                "your agent handles search timeout correctly, and consider " +
@@ -132,7 +199,8 @@ def main():
         Agent(AlphaBetaPlayer(score_fn=improved_score), "AB_Improved"),
         Agent(AlphaBetaPlayer(score_fn=custom_score), "LookAhead"),
         Agent(AlphaBetaPlayer(score_fn=custom_score_2), "RunBoyRun"),
-        Agent(AlphaBetaPlayer(score_fn=custom_score_3), "DangerousChase")
+        Agent(AlphaBetaPlayer(score_fn=custom_score_3), "DangerousChase"),
+        Agent(MCTSPlayer(), "MCTS")
     ]
 
     # Define a collection of agents to compete against the test agents